@@ -0,0 +1,169 @@
+"""
+Benchmarks of the hot analysis functions on synthetic patterns.
+
+    python -m benchmarks.run                         # 10² – 10⁴ holes, all templates
+    python -m benchmarks.run --full                  # up to 10⁶ holes
+    python -m benchmarks.run --save main             # store benchmarks/baselines/main.json
+    python -m benchmarks.run --compare main          # flag cases slower than the baseline
+
+Each case is timed (best and median of --repeat runs) and its peak Python /
+NumPy allocation is measured with tracemalloc in a separate run.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+import argparse
+import datetime
+import json
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_pattern, templates
+from src.blast_gif import create_timing_gif
+from src.blast_report import gap_overlap_map, symmetry_score
+from src.kriging import krige_adaptive, DEFAULT_NEIGHBOURS
+from src.pattern import grid_pattern
+
+BASELINE_DIR = pathlib.Path(__file__).resolve().parent / "baselines"
+QUICK_SIZES = (100, 1_000, 10_000)
+FULL_SIZES = (100, 1_000, 10_000, 100_000, 1_000_000)
+REGRESSION_THRESHOLD: float = 0.25      # slower than baseline by more than this share
+LOCAL_KRIGING_ABOVE: int = 2000
+
+
+@dataclass
+class Case:
+    name: str
+    setup: Callable[[pd.DataFrame], Callable[[], object]]   # pattern -> timed call
+    max_holes: int                                           # skip larger patterns
+
+
+def _grid(df: pd.DataFrame):
+    side = int(np.sqrt(len(df)))
+    return lambda: grid_pattern(side, side, 1.1, 1.0, 15.0, "staggered")
+
+
+def _krige(df: pd.DataFrame):
+    n = DEFAULT_NEIGHBOURS if len(df) > LOCAL_KRIGING_ABOVE else None
+    return lambda: krige_adaptive(df, "exponential", n_neighbours=n, workers=1)
+
+
+CASES: List[Case] = [
+    Case("grid_pattern", _grid, 1_000_000),
+    Case("gap_overlap_map", lambda df: (lambda: gap_overlap_map(df.copy(), 1.0, 1.0)), 1_000_000),
+    Case("symmetry_score", lambda df: (lambda: symmetry_score(df)), 1_000_000),
+    Case("create_timing_gif", lambda df: (lambda: create_timing_gif(df)), 100_000),
+    Case("krige_adaptive", _krige, 100_000),
+]
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"best_s": min(times), "median_s": statistics.median(times), "peak_mb": peak / 1024 ** 2}
+
+
+def run(cases: List[Case], names: List[str], sizes, repeat: int) -> pd.DataFrame:
+    rows = []
+    for template in names:
+        for size in sizes:
+            df = synthetic_pattern(template, size)
+            for case in cases:
+                if len(df) > case.max_holes:
+                    continue
+                fn = case.setup(df)
+                r = measure(fn, repeat)
+                rows.append({"case": case.name, "template": template, "holes": len(df), **r})
+                print(
+                    f"{case.name:<18} {template:<18} {len(df):>9} holes "
+                    f"{r['best_s'] * 1000:>10.1f} ms {r['peak_mb']:>9.1f} MB",
+                    file=sys.stderr,
+                )
+    return pd.DataFrame(rows)
+
+
+def _commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def save_baseline(results: pd.DataFrame, name: str) -> pathlib.Path:
+    BASELINE_DIR.mkdir(parents=True, exist_ok=True)
+    path = BASELINE_DIR / f"{name}.json"
+    doc = {
+        "meta": {
+            "commit": _commit(),
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+        },
+        "results": results.to_dict(orient="records"),
+    }
+    path.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    return path
+
+
+def compare(results: pd.DataFrame, name: str, threshold: float = REGRESSION_THRESHOLD) -> pd.DataFrame:
+    """Results joined with a saved baseline; `regression` marks cases whose
+    best time grew by more than `threshold`."""
+    doc = json.loads((BASELINE_DIR / f"{name}.json").read_text(encoding="utf-8"))
+    base = pd.DataFrame(doc["results"])
+    keys = ["case", "template", "holes"]
+    out = results.merge(base[keys + ["best_s", "peak_mb"]], on=keys, how="left", suffixes=("", "_base"))
+    out["time_ratio"] = out["best_s"] / out["best_s_base"]
+    out["memory_ratio"] = out["peak_mb"] / out["peak_mb_base"]
+    out["regression"] = out["time_ratio"] > 1 + threshold
+    return out
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--full", action="store_true", help="sizes up to 10^6 holes")
+    parser.add_argument("--sizes", type=int, nargs="+", help="hole counts (overrides --full)")
+    parser.add_argument("--templates", nargs="+", choices=templates(), help="patterns from datas/ (default: all)")
+    parser.add_argument("--only", nargs="+", choices=[c.name for c in CASES], help="cases to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", metavar="NAME", help="save the results as baseline NAME")
+    parser.add_argument("--compare", metavar="NAME", help="compare with baseline NAME")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("-o", "--output", type=pathlib.Path, help="also write the results table (.csv)")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (FULL_SIZES if args.full else QUICK_SIZES)
+    cases = [c for c in CASES if not args.only or c.name in args.only]
+    results = run(cases, args.templates or templates(), sizes, args.repeat)
+
+    if args.output is not None:
+        results.to_csv(args.output, index=False)
+    if args.save:
+        print(f"baseline -> {save_baseline(results, args.save)}", file=sys.stderr)
+    if args.compare:
+        table = compare(results, args.compare, args.threshold)
+        cols = ["case", "template", "holes", "best_s", "best_s_base", "time_ratio", "memory_ratio", "regression"]
+        print(table[cols].to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+        return 1 if table["regression"].any() else 0
+    print(results.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Synthetic hole patterns at any size, shaped like the templates in datas/.
+The template's delay field is interpolated over its normalized extent and
+sampled on a square grid of the requested size at the template's own hole
+spacing, so a 10⁶-hole "v_shape" still fires as a V.
+"""
+
+from typing import Dict, List
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = pathlib.Path(__file__).resolve().parent.parent / "datas"
+
+
+def templates() -> List[str]:
+    return sorted(p.stem for p in DATA_DIR.glob("*.csv"))
+
+
+def load_template(name: str) -> pd.DataFrame:
+    return pd.read_csv(DATA_DIR / f"{name}.csv", usecols=["x", "y", "delay"])
+
+
+def _template_spacing(df: pd.DataFrame) -> float:
+    from scipy.spatial import cKDTree
+    xy = df[["x", "y"]].to_numpy(dtype=float)
+    dist, _ = cKDTree(xy).query(xy, k=2)
+    d = dist[:, 1]
+    return float(np.median(d[d > 0])) if (d > 0).any() else 1.0
+
+
+def synthetic_pattern(template: str, n_holes: int, jitter: float = 0.05, seed: int = 0) -> pd.DataFrame:
+    """
+    About `n_holes` holes (a full square grid) following `template`.
+    jitter : survey noise, as a share of the spacing
+    """
+    from scipy.interpolate import LinearNDInterpolator, NearestNDInterpolator
+
+    tpl = load_template(template)
+    pts = tpl[["x", "y"]].to_numpy(dtype=float)
+    lo, span = pts.min(axis=0), np.ptp(pts, axis=0)
+    span[span == 0] = 1.0
+    unit = (pts - lo) / span
+    delay = tpl["delay"].to_numpy(dtype=float)
+
+    side = max(int(round(np.sqrt(n_holes))), 2)
+    u = np.linspace(0.0, 1.0, side)
+    gu, gv = np.meshgrid(u, u)
+    q = np.column_stack([gu.ravel(), gv.ravel()])
+    try:
+        z = LinearNDInterpolator(unit, delay)(q)
+    except Exception:           # collinear template: no triangulation
+        z = np.full(len(q), np.nan)
+    holes_nan = np.isnan(z)
+    if holes_nan.any():
+        z[holes_nan] = NearestNDInterpolator(unit, delay)(q[holes_nan])
+
+    spacing = _template_spacing(tpl)
+    rng = np.random.default_rng(seed)
+    x = gu.ravel() * (side - 1) * spacing + rng.normal(0, jitter * spacing, len(q))
+    y = gv.ravel() * (side - 1) * spacing + rng.normal(0, jitter * spacing, len(q))
+    return pd.DataFrame({"x": x, "y": y, "delay": np.round(z, 1)})
+
+
+def synthetic_suite(sizes, names: List[str] | None = None) -> Dict[tuple, pd.DataFrame]:
+    """{(template, size): pattern} for every template and size."""
+    return {(t, n): synthetic_pattern(t, n) for t in (names or templates()) for n in sizes}
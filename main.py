@@ -1,5 +1,6 @@
 import streamlit as st
 from src.config import DEFAULT_HOLE_DIAMETER, DEFAULT_EXPLOSIVE_DENSITY, DEFAULT_HOLE_DEPTH
+from src.profiling import begin_rerun, end_rerun, debug_panel, enabled_by_env
 
 import json, pathlib, io
 
@@ -41,7 +42,7 @@ def init_session_state():
         "hole_diameter": DEFAULT_HOLE_DIAMETER,
         "explosive_density": DEFAULT_EXPLOSIVE_DENSITY,
         "hole_depth": DEFAULT_HOLE_DEPTH,
-        "df": None,
+        "holes": None,
         "text": load_lang(st.session_state.lang)
     }
     for k, v in defaults.items():
@@ -53,6 +54,10 @@ if 'hole_diameter' not in st.session_state:
 
 TEXT = st.session_state.text
 
+# Opt-in profiling of each rerun (stage timings + allocations)
+with st.sidebar:
+    st.toggle(TEXT["profile_toggle"], value=enabled_by_env(), key="profiling")
+
 pages_list = [
     st.Page("src/home.py", title="Home", icon=":material/home:"),
     st.Page("src/charge_calculator.py", title="Charge Calculator", icon=":material/add_circle:"),
@@ -65,7 +70,14 @@ pages_list = [
 app = st.navigation(pages_list, position="top")
 
 if __name__ == "__main__":
-    app.run()
+    if st.session_state.profiling:
+        begin_rerun(app.title)
+    try:
+        app.run()
+    finally:
+        # logged even when the page stops or reruns early
+        profile_report = end_rerun()
+    debug_panel(profile_report, TEXT)
 else:
     st.write("This app is designed to assist with mining blast calculations and design.")
     st.write("Please run this app in a Streamlit environment to access the full functionality.")
@@ -1,11 +1,30 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from pykrige.ok import OrdinaryKriging
 import plotly.express as px
 import plotly.graph_objects as go
-from src.blast_report import delay_continuity, gap_overlap_map, symmetry_score
-from src.blast_gif import create_timing_gif
+from src.blast_report import delay_continuity, gap_overlap_map, neighbours_within, symmetry_report, charge_per_delay, CLASH_RATIO
+from src.blast_math import size_holes
+from src.vibration import ppv_grid, SITE_K, SITE_BETA
+from src.blast_gif import render_timing_animation, render_timing_animation_time, ANIMATION_FORMATS
+from src.kriging import shared_cache, design_hash, krige_adaptive, DEFAULT_NEIGHBOURS, NODE_BUDGET, LOCAL_MIN_HOLES, WINDOW_DEVIATION, VARIOGRAM_MODELS
+from src.config import DEFAULT_HOLE_DIAMETER, DEFAULT_EXPLOSIVE_DENSITY, DEFAULT_HOLE_DEPTH
+from src.plotting import hole_traces, detail_region, apply_bounds, lod_caption
+from src.profiling import stage
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_animation(design_key: str, fmt: str, time_axis: bool, _df: pd.DataFrame) -> bytes:
+    """Timing animation keyed by design content hash and render parameters."""
+    if time_axis:
+        return render_timing_animation_time(_df, fmt)
+    return render_timing_animation(_df, fmt)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_ppv(design_key: str, charge: np.ndarray, k: float, beta: float, _df: pd.DataFrame):
+    """PPV grid keyed by design content hash, per-hole charges and site law."""
+    return ppv_grid(_df, charge, k=k, beta=beta)
 
 
 TEXT = st.session_state.text
@@ -15,11 +34,12 @@ st.title(TEXT["analysis_title"])
 # ------------------------------------------------------------------
 # Guard
 # ------------------------------------------------------------------
-if st.session_state.df is None or st.session_state.df.empty:
+if st.session_state.holes is None or st.session_state.holes.empty:
     st.warning(TEXT["no_data"])
     st.stop()
 
-df = st.session_state.df
+holes = st.session_state.holes
+df = holes.to_frame(ids_as_index=True)   # zero-copy view, indexed by hole id
 required = {"x", "y", "delay"}
 if not required.issubset(df.columns):
     st.error(TEXT["bad_cols"])
@@ -37,33 +57,86 @@ with st.sidebar:
     st.subheader(TEXT["settings"])
     var_model = st.selectbox(
         TEXT["variogram_model"],
-        ["exponential", "spherical", "gaussian", "linear", "power"],
+        list(VARIOGRAM_MODELS),
         index=0,
     )
+    local_kriging = st.radio(
+        TEXT["kriging_mode"],
+        [TEXT["kriging_global"], TEXT["kriging_local"]],
+        index=0 if len(df) <= 2000 else 1,
+        horizontal=True,
+    ) == TEXT["kriging_local"]
+    n_neighbours = st.slider(
+        TEXT["kriging_neighbours"],
+        min_value=4,
+        max_value=64,
+        value=DEFAULT_NEIGHBOURS,
+        disabled=not local_kriging,
+    )
+    if local_kriging:
+        if len(df) <= LOCAL_MIN_HOLES:
+            st.caption(TEXT["kriging_local_exact"].format(min_holes=LOCAL_MIN_HOLES))
+        else:
+            st.caption(TEXT["kriging_local_approx"].format(dev=WINDOW_DEVIATION))
+    node_budget = st.select_slider(
+        TEXT["node_budget"],
+        options=[2_500, 5_000, 10_000, 20_000, 40_000],
+        value=NODE_BUDGET,
+    )
     color_scale = st.selectbox(TEXT["color_scale"], px.colors.named_colorscales(), index=0)
     spacing = st.number_input("Spacing (m)", value=st.session_state.get("spacing", 1.0), step=0.1)
     burden = st.number_input("Burden (m)", value=st.session_state.get("burden", 1.0), step=0.1)
+    mic_window = st.number_input(TEXT["mic_window"], min_value=0.1, value=8.0, step=1.0)
+    mic_limit = st.number_input(TEXT["mic_limit"], min_value=0.0, value=0.0, step=1.0)
+    with st.expander(TEXT["site_law"]):
+        site_k = st.number_input("K", min_value=1.0, value=SITE_K, step=10.0)
+        site_beta = st.number_input("β", min_value=0.1, value=SITE_BETA, step=0.1)
 
 # ------------------------------------------------------------------
 # 1. Technical Report Card
 # ------------------------------------------------------------------
 cont = delay_continuity(df)
-gaps = gap_overlap_map(df.copy(), spacing, burden)
-sym = symmetry_score(df)
+charges = size_holes(
+    df,
+    hole_diameter_mm=st.session_state.get("hole_diameter", DEFAULT_HOLE_DIAMETER),
+    hole_depth_m=st.session_state.get("hole_depth", DEFAULT_HOLE_DEPTH),
+    stemming_length_m=st.session_state.get("stemming_length", 0.51),
+    explosive_density=st.session_state.get("explosive_density", DEFAULT_EXPLOSIVE_DENSITY),
+)
+mic = charge_per_delay(df, charges["charge_mass"], mic_window, mic_limit or None)
+gaps = gap_overlap_map(holes.to_frame(ids_as_index=True), spacing, burden)
+sym_report = symmetry_report(df)
+sym = sym_report["point"]["geometry"]
 
-col1, col2, col3 = st.columns(3)
+col1, col2, col3, col4 = st.columns(4)
 col1.metric("Delay Continuity", "✅ PASS" if cont["ok"] else "❌ FAIL")
 col2.metric("Min Gap Ratio", f"{gaps['gap_ratio'].min():.2f}")
 col3.metric("Symmetry Score", f"{sym:.2%}")
+mic_flag = "" if mic["limit"] is None else ("✅ " if mic["ok"] else "❌ ")
+col4.metric(TEXT["mic_metric"].format(window=mic_window), f"{mic_flag}{mic['mic']:.1f} kg")
+st.caption(
+    TEXT["symmetry_detail"].format(
+        point_delay=sym_report["point"]["delay"],
+        mirror=sym_report["mirror"]["geometry"],
+        mirror_delay=sym_report["mirror"]["delay"],
+        axis=sym_report["mirror_axis_deg"] or 0.0,
+        tol=sym_report["tolerance"],
+    )
+)
 
 # ------------------------------------------------------------------
 # 2. Kriging Map (unchanged logic, shorter layout)
 # ------------------------------------------------------------------
-gridx = np.linspace(df["x"].min(), df["x"].max(), 100)
-gridy = np.linspace(df["y"].min(), df["y"].max(), 100)
+gridx, gridy, z, _ = krige_adaptive(
+    df,
+    var_model,
+    node_budget=node_budget,
+    cache=shared_cache(),
+    n_neighbours=n_neighbours if local_kriging else None,
+)
 
-ok = OrdinaryKriging(df["x"], df["y"], df["delay"], variogram_model=var_model)
-z, _ = ok.execute("grid", gridx, gridy)
+bounds = detail_region(df["x"], df["y"], TEXT, key="map_detail")
+hole_kw = dict(ids=df.index, bounds=bounds, name=TEXT["holes"])
 
 fig = go.Figure()
 fig.add_trace(
@@ -75,28 +148,63 @@ fig.add_trace(
         contours=dict(showlabels=True),
     )
 )
-fig.add_trace(
-    go.Scatter(
-        x=df["x"],
-        y=df["y"],
-        mode="markers+text",
-        marker=dict(color="red", size=8),
-        text=df["delay"].round(1),
-        textposition="top center",
-        name=TEXT["holes"],
-    )
-)
+traces, lod = hole_traces(df["x"], df["y"], labels=df["delay"].round(1), marker=dict(color="red", size=8), **hole_kw)
+fig.add_traces(traces)
 fig.update_xaxes(visible=False, showgrid=False, scaleanchor="y", scaleratio=1)
 fig.update_yaxes(visible=False, showgrid=False)
 
 fig.update_layout(height=600, margin=dict(l=0, r=0, t=0, b=0))
-st.plotly_chart(fig, use_container_width=True)
+
+# ------------------------------------------------------------------
+# 2b. PPV map (site law, max charge per delay)
+# ------------------------------------------------------------------
+ppv_x, ppv_y, ppv = cached_ppv(design_hash(df), charges["charge_mass"].to_numpy(), site_k, site_beta, df)
+ppv_fig = go.Figure()
+ppv_fig.add_trace(
+    go.Contour(
+        z=np.log10(ppv),
+        x=ppv_x,
+        y=ppv_y,
+        colorscale=color_scale,
+        customdata=ppv,
+        hovertemplate="x=%{x:.1f} y=%{y:.1f}<br>PPV=%{customdata:.1f} mm/s<extra></extra>",
+        colorbar=dict(title="log₁₀ PPV (mm/s)"),
+        contours=dict(showlabels=True),
+    )
+)
+ppv_fig.add_traces(hole_traces(df["x"], df["y"], marker=dict(color="red", size=5), **hole_kw)[0])
+ppv_fig.update_xaxes(visible=False, showgrid=False, scaleanchor="y", scaleratio=1)
+ppv_fig.update_yaxes(visible=False, showgrid=False)
+ppv_fig.update_layout(height=600, margin=dict(l=0, r=0, t=0, b=0))
+
+tab_delay, tab_ppv = st.tabs([TEXT["delay_map"], TEXT["ppv_map"]])
+apply_bounds(fig, bounds)
+apply_bounds(ppv_fig, bounds)
+with tab_delay, stage("plot delay map"):
+    st.plotly_chart(fig, use_container_width=True)
+with tab_ppv, stage("plot PPV map"):
+    st.plotly_chart(ppv_fig, use_container_width=True)
+lod_caption(lod, TEXT)
 
 # ------------------------------------------------------------------
 # 3. Gap / Overlap Table
 # ------------------------------------------------------------------
 with st.expander(TEXT["gap_table"], expanded=False):
-    st.dataframe(gaps[["x", "y", "min_dist", "gap_ratio"]])
+    st.dataframe(gaps[["x", "y", "min_dist", "nn_id", "gap_ratio"]])
+
+    clashes = neighbours_within(df, CLASH_RATIO * min(spacing, burden))
+    st.markdown(f"**{TEXT['clash_table']}**")
+    if clashes.empty:
+        st.caption(TEXT["no_clashes"])
+    else:
+        st.dataframe(clashes)
+
+# ------------------------------------------------------------------
+# 3b. Charge per delay (MIC) violations
+# ------------------------------------------------------------------
+if not mic["ok"]:
+    with st.expander(TEXT["mic_table"].format(n=len(mic["violations"])), expanded=False):
+        st.dataframe(mic["violations"])
 
 # ------------------------------------------------------------------
 # 4. Export PDF Summary (optional)
@@ -106,17 +214,29 @@ if st.button(TEXT["export_pdf"]):
         f"Blast Design Report\n"
         f"Delay Continuity: {'PASS' if cont['ok'] else 'FAIL'}\n"
         f"Min Gap Ratio: {gaps['gap_ratio'].min():.2f}\n"
-        f"Symmetry Score: {sym:.2%}"
+        f"Symmetry Score: {sym:.2%}\n"
+        f"MIC ({mic_window:g} ms): {mic['mic']:.1f} kg"
     )
     st.download_button(label="📥 Download PDF", data=pdf, file_name="blast_report.txt")
 
     # ------------------------------------------------------------------
     # Blast-timing GIF
     # ------------------------------------------------------------------
-gif_bytes = create_timing_gif(df)
-st.download_button(
-    label="📥 Download GIF",
-    data=gif_bytes,
-    file_name="blast_timing.gif",
-    mime="image/gif",
-)
\ No newline at end of file
+anim_fmt = st.selectbox(TEXT["animation_format"], list(ANIMATION_FORMATS), format_func=str.upper)
+time_axis = st.toggle(TEXT["animation_time_axis"], value=True)
+_, anim_mime, anim_ext = ANIMATION_FORMATS[anim_fmt]
+anim_key = (design_hash(df), anim_fmt, time_axis)
+
+# Rendered only on request; reruns and repeat downloads hit the cache.
+if st.button(TEXT["build_animation"]):
+    st.session_state.anim_key = anim_key
+
+if st.session_state.get("anim_key") == anim_key:
+    with st.spinner(TEXT["rendering_animation"]), stage("animation"):
+        anim_bytes = cached_animation(*anim_key, df)
+    st.download_button(
+        label=f"📥 Download {anim_fmt.upper()}",
+        data=anim_bytes,
+        file_name=f"blast_timing.{anim_ext}",
+        mime=anim_mime,
+    )
@@ -0,0 +1,179 @@
+"""
+Headless batch analysis of many designs.
+
+    python -m src.batch datas/ -o results.csv --surfaces results/
+
+Every hole CSV in the directory is read, checked for delay continuity, gaps
+and symmetry, and kriged, one design per worker process. One row of metrics
+per design is written to the results table (.csv, or .parquet when pyarrow
+is installed). With --surfaces, each design is also saved as a .blast
+project holding its kriged surface, ready to open on the Home page.
+"""
+
+from typing import Dict, List
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import os
+import pathlib
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.blast_report import delay_continuity, gap_overlap_map, neighbours_within, symmetry_report, CLASH_RATIO
+from src.design_io import save_project
+from src.ingest import read_holes_csv
+from src.kriging import KrigingCache, design_hash, krige_adaptive, DEFAULT_NEIGHBOURS, NODE_BUDGET
+
+LOCAL_KRIGING_ABOVE: int = 2000     # same switch-over as the Analyze page
+
+
+def analyze_design(
+        path: str,
+        spacing: float = 1.0,
+        burden: float = 1.0,
+        variogram_model: str = "exponential",
+        node_budget: int = NODE_BUDGET,
+        n_neighbours: int | None = None,
+        surfaces_dir: str | None = None,
+        root: str | None = None) -> Dict[str, object]:
+    """Metrics of one hole CSV. Runs in a worker process; errors are
+    reported in the `error` column rather than raised. The design is named
+    by its path relative to `root` (its file name without one)."""
+    started = time.perf_counter()
+    design = pathlib.Path(path)
+    design = design.relative_to(root) if root is not None else pathlib.Path(design.name)
+    row: Dict[str, object] = {"design": design.as_posix(), "error": ""}
+    try:
+        holes, report = read_holes_csv(path)
+        if holes is None:
+            raise ValueError(f"missing columns: {', '.join(report['missing'])}")
+        df = holes.to_frame()
+        row.update(holes=len(df), bad_rows=report["bad_rows"], design_hash=design_hash(df))
+
+        cont = delay_continuity(df)
+        row.update(continuity_ok=cont["ok"], continuity_violations=len(cont["violations"]))
+
+        gaps = gap_overlap_map(holes.to_frame(), spacing, burden)
+        clashes = neighbours_within(df, CLASH_RATIO * min(spacing, burden))
+        row.update(
+            min_gap_ratio=float(gaps["gap_ratio"].min()),
+            mean_gap_ratio=float(gaps["gap_ratio"].mean()),
+            clashes=len(clashes),
+        )
+
+        sym = symmetry_report(df)
+        row.update(
+            symmetry_point=sym["point"]["geometry"],
+            symmetry_point_delay=sym["point"]["delay"],
+            symmetry_mirror=sym["mirror"]["geometry"],
+            symmetry_mirror_delay=sym["mirror"]["delay"],
+            mirror_axis_deg=sym["mirror_axis_deg"],
+        )
+
+        if n_neighbours is None and len(df) > LOCAL_KRIGING_ABOVE:
+            n_neighbours = DEFAULT_NEIGHBOURS
+        cache = KrigingCache()
+        # one design per process already: no nested pool
+        gx, gy, z, ss = krige_adaptive(df, variogram_model, node_budget, cache=cache, n_neighbours=n_neighbours, workers=1)
+        row.update(
+            kriging=variogram_model if n_neighbours is None else f"{variogram_model} (local, {n_neighbours})",
+            grid_nodes=z.size,
+            delay_min=float(np.nanmin(z)),
+            delay_max=float(np.nanmax(z)),
+            variance_mean=float(np.nanmean(ss)),
+            variance_max=float(np.nanmax(ss)),
+        )
+
+        if surfaces_dir is not None:
+            out = pathlib.Path(surfaces_dir) / design.with_suffix(".blast")
+            out.parent.mkdir(parents=True, exist_ok=True)
+            out.write_bytes(save_project(holes, {}, cache.entries(row["design_hash"])))
+            row["surface_file"] = str(out)
+    except Exception as e:      # one bad design must not stop the batch
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["seconds"] = round(time.perf_counter() - started, 3)
+    return row
+
+
+def run_batch(
+        paths: List[str],
+        jobs: int | None = None,
+        progress=None,
+        **options) -> pd.DataFrame:
+    """Analyze `paths` across `jobs` processes; rows in input order."""
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(paths)))
+    if jobs == 1:
+        rows = []
+        for p in paths:
+            rows.append(analyze_design(p, **options))
+            if progress is not None:
+                progress(rows[-1])
+    else:
+        rows = [None] * len(paths)
+        with ProcessPoolExecutor(jobs) as pool:
+            futures = {pool.submit(analyze_design, p, **options): i for i, p in enumerate(paths)}
+            for f in as_completed(futures):
+                rows[futures[f]] = f.result()
+                if progress is not None:
+                    progress(rows[futures[f]])
+    return pd.DataFrame(rows)
+
+
+def write_table(table: pd.DataFrame, path: pathlib.Path) -> None:
+    if path.suffix == ".parquet":
+        table.to_parquet(path, index=False)
+    else:
+        table.to_csv(path, index=False)
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.batch", description="Analyze every hole CSV in a directory.")
+    parser.add_argument("directory", type=pathlib.Path)
+    parser.add_argument("-o", "--output", type=pathlib.Path, default=pathlib.Path("results.csv"),
+                        help="results table, .csv or .parquet (default: results.csv)")
+    parser.add_argument("--pattern", default="*.csv",
+                        help="file glob inside the directory, **/*.csv to include subdirectories (default: *.csv)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--spacing", type=float, default=1.0, help="design spacing for the gap map (m)")
+    parser.add_argument("--burden", type=float, default=1.0, help="design burden for the gap map (m)")
+    parser.add_argument("--model", default="exponential",
+                        choices=["exponential", "spherical", "gaussian", "linear", "power"])
+    parser.add_argument("--node-budget", type=int, default=NODE_BUDGET)
+    parser.add_argument("--neighbours", type=int, default=None,
+                        help=f"local kriging window (default: global up to {LOCAL_KRIGING_ABOVE} holes)")
+    parser.add_argument("--surfaces", type=pathlib.Path, default=None,
+                        help="directory for one .blast project per design with its kriged surface")
+    args = parser.parse_args(argv)
+
+    paths = sorted(str(p) for p in args.directory.glob(args.pattern))
+    if not paths:
+        print(f"No files matching {args.pattern} in {args.directory}", file=sys.stderr)
+        return 1
+    if args.surfaces is not None:
+        args.surfaces.mkdir(parents=True, exist_ok=True)
+
+    def report(row):
+        status = row["error"] or f"{row.get('holes', 0)} holes"
+        print(f"{row['design']}: {status} ({row['seconds']} s)", file=sys.stderr)
+
+    table = run_batch(
+        paths,
+        args.jobs,
+        progress=report,
+        spacing=args.spacing,
+        burden=args.burden,
+        variogram_model=args.model,
+        node_budget=args.node_budget,
+        n_neighbours=args.neighbours,
+        surfaces_dir=None if args.surfaces is None else str(args.surfaces),
+        root=str(args.directory),
+    )
+    write_table(table, args.output)
+    print(f"{len(table)} designs -> {args.output}", file=sys.stderr)
+    return 1 if (table["error"] != "").any() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
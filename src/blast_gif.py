@@ -1,45 +1,192 @@
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-import tempfile
-import os
+from PIL import Image, ImageDraw, ImageFont
 import io
 
+from src.profiling import profiled
+
+# format -> (Pillow format, mime type, file extension)
+ANIMATION_FORMATS = {
+    "gif": ("GIF", "image/gif", "gif"),
+    "apng": ("PNG", "image/apng", "png"),
+    "webp": ("WEBP", "image/webp", "webp"),
+}
+
+# palette indices used by every frame
+WHITE, BLACK, RED, LIME, GREY = range(5)
+PALETTE = [255, 255, 255, 0, 0, 0, 255, 0, 0, 0, 255, 0, 160, 160, 160]
+
+# time mode: holes fade from lime to grey over FADE_LEVELS palette entries
+FADE_LEVELS = 8
+FADE_START = len(PALETTE) // 3
+for _i in range(FADE_LEVELS):
+    _t = _i / (FADE_LEVELS - 1)
+    PALETTE += [round(160 * _t), round(255 - 95 * _t), round(160 * _t)]
+
+TIME_SCALE = 20      # slow-motion factor for the time mode (1 = real time)
+MAX_FRAMES = 150     # frame budget for the time mode
+
+TITLE = "Blast Timing Animation"
+MARGIN_PX = 40
+
+
+def _layout(df: pd.DataFrame, size: int):
+    """Pixel centres (px, py) and dot radius for every hole."""
+    x = df["x"].to_numpy(dtype=float)
+    y = df["y"].to_numpy(dtype=float)
+    span = max(np.ptp(x) if len(x) else 0.0, np.ptp(y) if len(y) else 0.0) or 1.0
+    scale = (size - 2 * MARGIN_PX) / span
+    px = MARGIN_PX + (x - x.min()) * scale
+    py = size - MARGIN_PX - (y - y.min()) * scale      # image y grows downwards
+    r = float(np.clip(0.3 * (size - 2 * MARGIN_PX) / np.sqrt(max(len(x), 1)), 2, 10))
+    return px, py, r
+
+
+def _dots(draw: ImageDraw.ImageDraw, px, py, r: float, fill: int, outline: int | None = BLACK):
+    for cx, cy in zip(px.tolist(), py.tolist()):
+        draw.ellipse((cx - r, cy - r, cx + r, cy + r), fill=fill, outline=outline)
+
+
+def _text(draw: ImageDraw.ImageDraw, cx: float, bottom: float, text: str, font):
+    """Draw `text` centred on cx with its bottom at `bottom` (works with bitmap fonts)."""
+    x0, y0, x1, y1 = draw.textbbox((0, 0), text, font=font)
+    draw.text((cx - (x1 - x0) / 2, bottom - (y1 - y0) - y0), text, fill=BLACK, font=font)
+
+
+def _background(df: pd.DataFrame, px, py, r: float, size: int, labels: bool) -> Image.Image:
+    """Static frame: title, every hole in red and its delay label."""
+    img = Image.new("P", (size, size), WHITE)
+    img.putpalette(PALETTE)
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default()
+    _text(draw, size / 2, MARGIN_PX * 0.6, TITLE, font)
+    _dots(draw, px, py, r, RED)
+    if labels:
+        for cx, cy, d in zip(px.tolist(), py.tolist(), df["delay"].tolist()):
+            _text(draw, cx, cy - r - 1, f"{d:g}", font)
+    return img
+
+
+def _encode(frames, fmt: str, durations) -> bytes:
+    pil_fmt = ANIMATION_FORMATS[fmt][0]
+    if pil_fmt == "WEBP":
+        frames = [f.convert("RGB") for f in frames]
+    buf = io.BytesIO()
+    frames[0].save(
+        buf,
+        format=pil_fmt,
+        save_all=True,
+        append_images=frames[1:],
+        duration=durations,
+        loop=0,
+        **({"optimize": True} if pil_fmt == "GIF" else {}),
+    )
+    return buf.getvalue()
+
+
+@profiled
+def render_timing_animation(
+        df: pd.DataFrame,
+        fmt: str = "gif",
+        frame_ms: int = 500,
+        size: int = 480,
+        labels: bool | None = None) -> bytes:
+    """
+    Firing-order animation rendered with Pillow, fully in memory.
+    One frame per distinct delay: holes that share a delay light up together.
+    fmt     : "gif", "apng" or "webp"
+    labels  : draw delay labels; default only when dots are big enough
+    """
+    if fmt not in ANIMATION_FORMATS:
+        raise ValueError(f"Unknown animation format '{fmt}'")
+
+    df = df.sort_values("delay", kind="stable").reset_index(drop=True)
+    px, py, r = _layout(df, size)
+    if labels is None:
+        labels = r >= 6
+    base = _background(df, px, py, r, size, labels)
+
+    # Each frame = background + the current delay group in lime. Only the
+    # dots of that group differ from the background, so GIF/APNG/WebP
+    # encoders store just those regions.
+    delays = df["delay"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, delays[1:] != delays[:-1]])
+    ends = np.r_[starts[1:], len(delays)]
+
+    frames = [base]
+    for s, e in zip(starts, ends):
+        frame = base.copy()
+        _dots(ImageDraw.Draw(frame), px[s:e], py[s:e], r, LIME)
+        frames.append(frame)
+    return _encode(frames, fmt, [frame_ms] * len(frames))
+
+
+@profiled
+def render_timing_animation_time(
+        df: pd.DataFrame,
+        fmt: str = "gif",
+        fps: int = 10,
+        time_scale: float = TIME_SCALE,
+        max_frames: int = MAX_FRAMES,
+        fade_ms: float | None = None,
+        size: int = 480,
+        labels: bool | None = None) -> bytes:
+    """
+    Firing animation on a real time axis.
+    Playback runs `time_scale` times slower than the shot; the shot plus a
+    final fade is cut into at most `max_frames` equal time bins, so the frame
+    count depends on duration and fps, not on the number of holes. Each frame
+    lasts bin_ms * time_scale, which keeps that speed when the frame budget
+    is hit. A hole turns lime in the bin it fires and fades to grey over
+    `fade_ms` of shot time; the animation ends once the last hole has faded.
+    """
+    if fmt not in ANIMATION_FORMATS:
+        raise ValueError(f"Unknown animation format '{fmt}'")
+
+    px, py, r = _layout(df, size)
+    if labels is None:
+        labels = r >= 6
+    base = _background(df, px, py, r, size, labels)
+
+    delays = df["delay"].to_numpy(dtype=float)
+    t0 = float(delays.min())
+    duration = float(delays.max()) - t0
+    fade_ms = fade_ms or duration / 5
+    span = duration + fade_ms                  # shot plus the fade of the last holes
+    n_frames = int(np.ceil(span * time_scale / 1000 * fps)) + 1
+    n_frames = max(2, min(n_frames, max_frames))
+    bin_ms = span / (n_frames - 1) or 1.0
+    fade_ms = max(fade_ms, bin_ms)
+
+    fire_bin = np.floor((delays - t0) / bin_ms).astype(int)
+    frame_ms = max(20, round(bin_ms * time_scale))
+
+    frames = [base]
+    level = np.full(len(delays), -1)          # -1 = not fired yet
+    current = base
+    f = 0
+    # one bin past the budget at most, for rounding of the last fade
+    while f < n_frames or (level < FADE_LEVELS - 1).any():
+        age = (f - fire_bin) * bin_ms
+        new_level = np.where(
+            age >= 0,
+            np.minimum((age / fade_ms * (FADE_LEVELS - 1)).astype(int), FADE_LEVELS - 1),
+            -1,
+        )
+        changed = np.flatnonzero(new_level != level)
+        current = current.copy()
+        draw = ImageDraw.Draw(current)
+        # only holes whose colour changed are redrawn
+        for lv in np.unique(new_level[changed]):
+            sel = changed[new_level[changed] == lv]
+            _dots(draw, px[sel], py[sel], r, FADE_START + int(lv))
+        level = new_level
+        frames.append(current)
+        f += 1
+    return _encode(frames, fmt, [frame_ms] * len(frames))
+
+
 def create_timing_gif(df: pd.DataFrame, fps: int = 2, duration_ms: int = 500) -> bytes:
-    df = df.sort_values("delay").reset_index(drop=True)
-
-    fig, ax = plt.subplots(figsize=(6, 6))
-    ax.set_aspect("equal")
-    ax.axis("off")
-    ax.set_title("Blast Timing Animation", fontsize=14)
-
-    sc = ax.scatter(df["x"], df["y"], c="red", s=150, edgecolors="k")
-    for _, row in df.iterrows():
-        ax.text(row.x, row.y, str(row.delay), ha="center", va="center", fontsize=8)
-
-    def init():
-        sc.set_color(["red"] * len(df))
-        return sc,
-
-    def animate(frame):
-        colors = ["red"] * len(df)
-        colors[frame] = "lime"
-        sc.set_color(colors)
-        return sc,
-
-    frames = len(df)
-    anim = FuncAnimation(fig, animate, init_func=init, frames=frames,
-                         interval=duration_ms, blit=False)
-
-    # 1️⃣ Write to temporary file
-    with tempfile.NamedTemporaryFile(suffix=".gif", delete=False) as tmp:
-        tmp_path = tmp.name
-    anim.save(tmp_path, writer="pillow", fps=fps)
-    plt.close(fig)
-
-    # 2️⃣ Read back into BytesIO
-    with open(tmp_path, "rb") as f:
-        gif_bytes = f.read()
-    os.remove(tmp_path)
-    return gif_bytes
\ No newline at end of file
+    """GIF of the firing order, one frame per delay at `fps` frames/s."""
+    frame_ms = int(1000 / fps) if fps else duration_ms
+    return render_timing_animation(df, "gif", frame_ms=frame_ms)
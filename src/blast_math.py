@@ -3,12 +3,28 @@ Core blast-design calculations.
 Add spacing / burden logic here when ready.
 """
 
-from typing import Tuple
+from typing import Dict, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.config import DEFAULT_HOLE_DIAMETER, DEFAULT_EXPLOSIVE_DENSITY, DEFAULT_HOLE_DEPTH
+from src.profiling import profiled
 
 # ---------- constants ----------
 ROCK_DENSITY_T_M3: float = 2.7     # placeholder
 POWDER_FACTOR_KG_T: float = 0.45   # placeholder
+MAX_BURDEN_DIAMETERS: float = 40.0 # burden cap, in hole diameters (fragmentation limit)
+PARALLEL_CANDIDATES: int = 2_000_000   # sweeps larger than this are split across processes
+SWEEP_CHUNK: int = 500_000             # candidates per worker task
+MAX_SWEEP_CANDIDATES: int = 20_000_000 # grid size accepted by sweep_front
+SWEEP_SAMPLE_SIDE: int = 150           # plot sample: one candidate per cell of this grid, per chunk
+
+SWEEP_INPUTS = ("hole_diameter", "hole_depth", "explosive_density", "stemming_length", "powder_factor")
 
 # ---------- existing ----------
 def linear_charge(explosive_density: float, hole_diameter_mm: float) -> float:
@@ -68,3 +84,320 @@ def burden(
     """
     return math.sqrt((linear_charge_kg_m * charge_length_m) / (sp_ratio * hole_depth_m * powder_factor)) # quick rule of thumb
 
+
+
+# ---------- vectorized (per-hole arrays) ----------
+# Same formulas as above, but every argument may be a scalar, a NumPy array
+# or a DataFrame column; results broadcast to one value per hole.
+
+def linear_charge_array(explosive_density, hole_diameter_mm) -> np.ndarray:
+    """kg/m along each hole."""
+    explosive_density = np.asarray(explosive_density, dtype=float)
+    hole_diameter_mm = np.asarray(hole_diameter_mm, dtype=float)
+    return explosive_density * hole_diameter_mm ** 2 / 1273
+
+
+def required_linear_charge_array(o_h_diameter, cc_distance) -> np.ndarray:
+    """Cut-hole charge for each open hole / cc distance pair."""
+    o_h_diameter = np.asarray(o_h_diameter, dtype=float)
+    cc_distance = np.asarray(cc_distance, dtype=float)
+    return 1.67 * np.power(10.0, -3) * np.power(cc_distance / o_h_diameter, 3 / 2) * (cc_distance - (o_h_diameter / 2))
+
+
+def hole_charge_mass_array(linear_charge_kg_m, charge_length_m) -> np.ndarray:
+    """kg per hole."""
+    return np.asarray(linear_charge_kg_m, dtype=float) * np.asarray(charge_length_m, dtype=float)
+
+
+def total_charge_mass_array(charge_mass_per_hole, hole_count=1) -> float:
+    """kg for the entire blast (sum over holes)."""
+    return float(np.sum(np.asarray(charge_mass_per_hole, dtype=float) * np.asarray(hole_count, dtype=float)))
+
+
+def spacing_array(burden, sp_ratio=1.15) -> np.ndarray:
+    """m, one spacing per burden."""
+    return np.asarray(sp_ratio, dtype=float) * np.asarray(burden, dtype=float)
+
+
+def burden_array(
+        charge_length_m,
+        linear_charge_kg_m,
+        hole_depth_m,
+        powder_factor=POWDER_FACTOR_KG_T,
+        sp_ratio=1.15) -> np.ndarray:
+    """m, one burden per hole (same rule of thumb as `burden`)."""
+    charge_length_m = np.asarray(charge_length_m, dtype=float)
+    linear_charge_kg_m = np.asarray(linear_charge_kg_m, dtype=float)
+    hole_depth_m = np.asarray(hole_depth_m, dtype=float)
+    powder_factor = np.asarray(powder_factor, dtype=float)
+    sp_ratio = np.asarray(sp_ratio, dtype=float)
+    return np.sqrt((linear_charge_kg_m * charge_length_m) / (sp_ratio * hole_depth_m * powder_factor))
+
+
+@profiled
+def size_holes(
+        holes: pd.DataFrame,
+        hole_diameter_mm: float = DEFAULT_HOLE_DIAMETER,
+        hole_depth_m: float = DEFAULT_HOLE_DEPTH,
+        stemming_length_m: float = 0.0,
+        explosive_density: float = DEFAULT_EXPLOSIVE_DENSITY,
+        powder_factor: float = POWDER_FACTOR_KG_T,
+        sp_ratio: float = 1.15) -> pd.DataFrame:
+    """
+    Per-hole charge and pattern figures for a whole hole table in one call.
+    holes : DataFrame, optional columns `diameter` (mm), `depth` (m),
+            `stemming` (m), `density` (g/cm³); missing columns fall back
+            to the scalar arguments.
+    returns : DataFrame indexed like `holes` with linear_charge (kg/m),
+              charge_length (m), charge_mass (kg), burden (m), spacing (m)
+    """
+    n = len(holes)
+
+    def col(name, default):
+        if name in holes.columns:
+            return holes[name].to_numpy(dtype=float)
+        return np.full(n, default, dtype=float)
+
+    diameter = col("diameter", hole_diameter_mm)
+    depth = col("depth", hole_depth_m)
+    stemming = col("stemming", stemming_length_m)
+    density = col("density", explosive_density)
+
+    charge_len = depth - stemming
+    lin = linear_charge_array(density, diameter)
+    mass = hole_charge_mass_array(lin, charge_len)
+    bur = burden_array(charge_len, lin, depth, powder_factor, sp_ratio)
+    return pd.DataFrame(
+        {
+            "linear_charge": lin,
+            "charge_length": charge_len,
+            "charge_mass": mass,
+            "burden": bur,
+            "spacing": spacing_array(bur, sp_ratio),
+        },
+        index=holes.index,
+    )
+
+
+# ---------- design sweep ----------
+def _evaluate(
+        axes: Tuple[np.ndarray, ...],
+        start: int,
+        stop: int,
+        sp_ratio: float,
+        rock_density: float,
+        max_burden_d: float) -> Dict[str, np.ndarray]:
+    """Candidates start..stop of the flattened input grid."""
+    flat = np.arange(start, stop)
+    idx = np.unravel_index(flat, tuple(len(a) for a in axes))
+    diameter, depth, density, stemming, pf = (a[i] for a, i in zip(axes, idx))
+
+    charge_len = depth - stemming
+    lin = linear_charge_array(density, diameter)
+    mass = hole_charge_mass_array(lin, charge_len)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bur = burden_array(charge_len, lin, depth, pf, sp_ratio)
+        bur = np.minimum(bur, max_burden_d * diameter / 1000)
+        spc = spacing_array(bur, sp_ratio)
+        tonnes = bur * spc * depth * rock_density     # rock broken per hole (bench = hole depth)
+        kg_per_t = mass / tonnes
+        drill_m_per_t = depth / tonnes
+    valid = (charge_len > 0) & np.isfinite(kg_per_t) & np.isfinite(drill_m_per_t)
+    return {
+        "hole_diameter": diameter,
+        "hole_depth": depth,
+        "explosive_density": density,
+        "stemming_length": stemming,
+        "powder_factor": pf,
+        "charge_mass": mass,
+        "burden": bur,
+        "spacing": spc,
+        "kg_per_t": kg_per_t,
+        "drill_m_per_t": drill_m_per_t,
+        "valid": valid,
+    }
+
+
+@profiled
+def sweep_designs(
+        hole_diameters_mm: Sequence[float],
+        hole_depths_m: Sequence[float],
+        explosive_densities: Sequence[float],
+        stemming_lengths_m: Sequence[float],
+        powder_factors: Sequence[float],
+        sp_ratio: float = 1.15,
+        rock_density: float = ROCK_DENSITY_T_M3,
+        max_burden_d: float = MAX_BURDEN_DIAMETERS,
+        workers: int | None = None) -> pd.DataFrame:
+    """
+    Every combination of the input values, evaluated as one NumPy grid.
+    Burden follows `burden_array`, capped at `max_burden_d` hole diameters;
+    capped designs break less rock than their powder factor asks for, which
+    is what makes explosive and drilling trade off against each other.
+    Grids above PARALLEL_CANDIDATES are split into chunks over `workers`
+    processes (None = all cores).
+    returns : one row per valid candidate with the inputs, charge_mass (kg),
+              burden / spacing (m), kg_per_t and drill_m_per_t
+    """
+    axes = sweep_axes(hole_diameters_mm, hole_depths_m, explosive_densities, stemming_lengths_m, powder_factors)
+    parts = _map_chunks(_evaluate, axes, (sp_ratio, rock_density, max_burden_d), workers)
+    table = pd.DataFrame({k: np.concatenate([p[k] for p in parts]) for k in parts[0]})
+    return table[table.pop("valid")].reset_index(drop=True)
+
+
+def sweep_axes(*values: Sequence[float]) -> Tuple[np.ndarray, ...]:
+    """Sorted distinct values of each swept input."""
+    return tuple(np.unique(np.asarray(v, dtype=float)) for v in values)
+
+
+def sweep_size(*values: Sequence[float]) -> int:
+    """Number of candidates of a sweep over `values`."""
+    return int(np.prod([len(a) for a in sweep_axes(*values)]))
+
+
+def _map_chunks(fn, axes: Tuple[np.ndarray, ...], args: tuple, workers: int | None) -> list:
+    """fn(axes, start, stop, *args) over the flattened grid: in-process up to
+    PARALLEL_CANDIDATES, else in SWEEP_CHUNK slices over `workers` processes."""
+    total = int(np.prod([len(a) for a in axes]))
+    workers = workers or os.cpu_count() or 1
+    if total <= PARALLEL_CANDIDATES or workers <= 1:
+        return [fn(axes, 0, total, *args)]
+    bounds = [(s, min(s + SWEEP_CHUNK, total)) for s in range(0, total, SWEEP_CHUNK)]
+    with ProcessPoolExecutor(min(workers, len(bounds))) as pool:
+        return list(pool.map(fn, *zip(*[(axes, a, b, *args) for a, b in bounds])))
+
+
+@dataclass
+class SweepResult:
+    """What the design sweep page needs from a sweep, without every row."""
+    designs: pd.DataFrame       # Pareto front plus every row that can rank in the top `keep`, flagged `pareto`
+    sample: pd.DataFrame        # kg_per_t / drill_m_per_t of a thinned set of candidates, for plotting
+    candidates: int             # valid candidates evaluated
+    ranges: Dict[str, Tuple[float, float]]   # min / max of each objective over all candidates
+
+
+def _grid_sample(a: np.ndarray, b: np.ndarray, side: int) -> np.ndarray:
+    """Positions of the first point in each cell of a side x side grid over (a, b)."""
+    if len(a) == 0:
+        return np.empty(0, dtype=np.intp)
+    ca = np.minimum(((a - a.min()) / max(np.ptp(a), 1e-12) * side).astype(np.int64), side - 1)
+    cb = np.minimum(((b - b.min()) / max(np.ptp(b), 1e-12) * side).astype(np.int64), side - 1)
+    _, first = np.unique(cb * side + ca, return_index=True)
+    return np.sort(first)
+
+
+def _sweep_chunk(
+        axes: Tuple[np.ndarray, ...],
+        start: int,
+        stop: int,
+        sp_ratio: float,
+        rock_density: float,
+        max_burden_d: float,
+        keep: int) -> SweepResult:
+    """Candidates start..stop reduced to their possible top-`keep` rows, a
+    plot sample and the objective ranges. Runs in a worker process."""
+    part = _evaluate(axes, start, stop, sp_ratio, rock_density, max_burden_d)
+    table = pd.DataFrame(part)
+    table = table[table.pop("valid")]
+    a = table["kg_per_t"].to_numpy()
+    b = table["drill_m_per_t"].to_numpy()
+    ranges = {"kg_per_t": (a.min(), a.max()), "drill_m_per_t": (b.min(), b.max())} if len(table) else {}
+    sample = table[["kg_per_t", "drill_m_per_t"]].iloc[_grid_sample(a, b, SWEEP_SAMPLE_SIDE)]
+    return SweepResult(table[top_candidates(table, keep)], sample, len(table), ranges)
+
+
+@profiled
+def sweep_front(
+        hole_diameters_mm: Sequence[float],
+        hole_depths_m: Sequence[float],
+        explosive_densities: Sequence[float],
+        stemming_lengths_m: Sequence[float],
+        powder_factors: Sequence[float],
+        keep: int = 50,
+        sp_ratio: float = 1.15,
+        rock_density: float = ROCK_DENSITY_T_M3,
+        max_burden_d: float = MAX_BURDEN_DIAMETERS,
+        workers: int | None = None,
+        max_candidates: int = MAX_SWEEP_CANDIDATES) -> SweepResult:
+    """
+    sweep_designs() reduced inside each worker: a chunk returns only its
+    rows that can still rank in the top `keep` (see top_candidates), so the
+    Pareto front and every top-`keep` ranking are exact while memory stays
+    bounded by the chunk size, not the grid size.
+    Raises ValueError above `max_candidates`.
+    """
+    axes = sweep_axes(hole_diameters_mm, hole_depths_m, explosive_densities, stemming_lengths_m, powder_factors)
+    total = int(np.prod([len(a) for a in axes]))
+    if total > max_candidates:
+        raise ValueError(f"{total:,} candidates exceed the sweep limit of {max_candidates:,}")
+    parts = _map_chunks(_sweep_chunk, axes, (sp_ratio, rock_density, max_burden_d, keep), workers)
+
+    designs = pd.concat([p.designs for p in parts], ignore_index=True)
+    designs = designs[top_candidates(designs, keep)].reset_index(drop=True)
+    designs["pareto"] = pareto_front(designs)
+    spans = [p.ranges for p in parts if p.ranges]
+    ranges = {
+        c: (min(r[c][0] for r in spans), max(r[c][1] for r in spans)) for c in ("kg_per_t", "drill_m_per_t")
+    } if spans else {}
+    sample = pd.concat([p.sample for p in parts], ignore_index=True)
+    return SweepResult(designs, sample, sum(p.candidates for p in parts), ranges)
+
+
+def pareto_front(table: pd.DataFrame, objectives: Tuple[str, str] = ("kg_per_t", "drill_m_per_t")) -> np.ndarray:
+    """
+    Boolean mask of the rows not dominated on the two `objectives` (both
+    minimized). O(n log n): rows sorted by the first objective are on the
+    front when they beat the running minimum of the second.
+    """
+    a = table[objectives[0]].to_numpy(dtype=float)
+    b = table[objectives[1]].to_numpy(dtype=float)
+    order = np.lexsort((b, a))
+    best_before = np.minimum.accumulate(np.concatenate([[np.inf], b[order][:-1]]))
+    mask = np.zeros(len(table), dtype=bool)
+    mask[order] = b[order] < best_before
+    return mask
+
+
+def top_candidates(
+        table: pd.DataFrame,
+        keep: int,
+        objectives: Tuple[str, str] = ("kg_per_t", "drill_m_per_t"),
+        block: int = 4096) -> np.ndarray:
+    """
+    Boolean mask of the rows that can rank in the top `keep` of
+    rank_designs() for some weight. Every dropped row is dominated by at
+    least `keep` others, which score no worse under any weighting. Rows
+    sorted by the first objective are checked block by block against the
+    `keep`-th smallest second objective seen before the block: a superset,
+    computed in O(n log n).
+    """
+    a = table[objectives[0]].to_numpy(dtype=float)
+    b = table[objectives[1]].to_numpy(dtype=float)
+    order = np.lexsort((b, a))
+    b_sorted = b[order]
+    ok = np.ones(len(b), dtype=bool)
+    smallest = np.empty(0)
+    for s in range(0, len(b), block):
+        part = b_sorted[s:s + block]
+        if len(smallest) >= keep:
+            # `keep` earlier rows have a <= this a and a strictly smaller b
+            ok[s:s + block] = part <= smallest[keep - 1]
+        smallest = np.sort(np.concatenate([smallest, part]))[:keep]
+    mask = np.zeros(len(b), dtype=bool)
+    mask[order] = ok
+    return mask
+
+
+def rank_designs(
+        table: pd.DataFrame,
+        explosive_weight: float = 0.5,
+        ranges: Dict[str, Tuple[float, float]] | None = None) -> np.ndarray:
+    """Weighted score (lower is better) of min-max normalized explosive per
+    tonne and drilling per tonne; `explosive_weight` in 0..1.
+    ranges : {objective: (min, max)} to normalize by, default the table's own"""
+    def norm(c):
+        v = table[c].to_numpy(dtype=float)
+        lo, hi = ranges[c] if ranges else ((v.min(), v.max()) if len(v) else (0.0, 0.0))
+        span = hi - lo
+        return (v - lo) / span if span > 0 else np.zeros(len(v))
+    return explosive_weight * norm("kg_per_t") + (1 - explosive_weight) * norm("drill_m_per_t")
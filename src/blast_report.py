@@ -1,7 +1,9 @@
 import pandas as pd
 import numpy as np
 from typing import Dict
+from src.profiling import profiled
 
+@profiled
 def delay_continuity(df: pd.DataFrame, max_jump: float = 2.0) -> Dict[str, any]:
     """Check if delay increases monotonically within tolerance."""
     diffs = df["delay"].diff().dropna()
@@ -12,19 +14,189 @@ def delay_continuity(df: pd.DataFrame, max_jump: float = 2.0) -> Dict[str, any]:
         "max_jump": max_jump,
     }
 
+@profiled
 def gap_overlap_map(df: pd.DataFrame, spacing: float, burden: float) -> pd.DataFrame:
-    """Return hole-to-hole distance vs expected spacing/burden."""
-    from scipy.spatial.distance import pdist, squareform
-    dist = squareform(pdist(df[["x", "y"]]))
-    np.fill_diagonal(dist, np.nan)
-    df["min_dist"] = np.nanmin(dist, axis=1)
+    """Return hole-to-hole distance vs expected spacing/burden.
+
+    Adds `min_dist`, `gap_ratio` and `nn_id` (index label of the nearest hole).
+    Uses a KD-tree, so it runs in O(n log n) time and O(n) memory.
+    """
+    from scipy.spatial import cKDTree
+    xy = df[["x", "y"]].to_numpy(dtype=float)
+    n = len(xy)
+    if n < 2:
+        df["min_dist"] = np.nan
+        df["nn_id"] = pd.Series(pd.NA, index=df.index, dtype="object")
+        df["gap_ratio"] = np.nan
+        return df
+
+    dist, idx = cKDTree(xy).query(xy, k=2, workers=-1)
+    # Column 0 is normally the hole itself; with duplicated coordinates the
+    # tree may return the twin first, which is then the nearest neighbour.
+    self_first = idx[:, 0] == np.arange(n)
+    nn = np.where(self_first, idx[:, 1], idx[:, 0])
+    df["min_dist"] = np.where(self_first, dist[:, 1], 0.0)
+    df["nn_id"] = df.index.to_numpy()[nn]
     df["gap_ratio"] = df["min_dist"] / min(spacing, burden)
     return df
 
-def symmetry_score(df: pd.DataFrame) -> float:
-    """Simple symmetry score 0-1 based on centroid distance."""
-    centroid = df[["x", "y"]].mean()
-    mirrored = df.copy()
-    mirrored[["x", "y"]] = 2 * centroid - mirrored[["x", "y"]]
-    dists = pd.merge(df, mirrored, on=["x", "y"], how="inner")
-    return len(dists) / len(df)
\ No newline at end of file
+@profiled
+def charge_per_delay(
+        df: pd.DataFrame,
+        charge: np.ndarray,
+        window_ms: float = 8.0,
+        limit: float | None = None) -> Dict[str, any]:
+    """Maximum instantaneous charge (MIC) over any `window_ms` delay window.
+
+    charge : kg per hole, aligned with `df` (see blast_math.size_holes)
+    Windows start at every distinct delay and cover [t, t + window_ms).
+    Sort + prefix sums + binary search: O(n log n).
+    """
+    delay = df["delay"].to_numpy(dtype=float)
+    charge = np.asarray(charge, dtype=float)
+    order = np.argsort(delay, kind="stable")
+    t = delay[order]
+    cum = np.concatenate([[0.0], np.cumsum(charge[order])])
+
+    starts = np.flatnonzero(np.r_[True, t[1:] != t[:-1]]) if len(t) else np.array([], dtype=int)
+    ends = np.searchsorted(t, t[starts] + window_ms, side="left")
+    totals = cum[ends] - cum[starts]
+    windows = pd.DataFrame(
+        {
+            "start_ms": t[starts],
+            "end_ms": t[starts] + window_ms,
+            "holes": ends - starts,
+            "charge_kg": totals,
+        }
+    )
+    mic = float(totals.max()) if len(totals) else 0.0
+    violations = windows[windows["charge_kg"] > limit] if limit is not None else windows.iloc[0:0]
+    return {
+        "ok": violations.empty,
+        "mic": mic,
+        "window_ms": window_ms,
+        "limit": limit,
+        "violations": violations.reset_index(drop=True),
+    }
+
+CLASH_RATIO = 0.5
+
+@profiled
+def neighbours_within(df: pd.DataFrame, radius: float, k: int = 8) -> pd.DataFrame:
+    """Up to `k` nearest neighbours of every hole closer than `radius`.
+
+    Returns one row per (id, neighbour_id) pair, each pair reported once,
+    sorted by distance.
+    """
+    from scipy.spatial import cKDTree
+    xy = df[["x", "y"]].to_numpy(dtype=float)
+    n = len(xy)
+    empty = pd.DataFrame({"id": [], "neighbour_id": [], "dist": []})
+    if n < 2 or radius <= 0:
+        return empty
+
+    k = min(k + 1, n)
+    dist, idx = cKDTree(xy).query(xy, k=k, distance_upper_bound=radius, workers=-1)
+    src = np.repeat(np.arange(n), k)
+    dst = idx.ravel()
+    d = dist.ravel()
+    keep = (dst < n) & (src != dst)
+    a = np.minimum(src[keep], dst[keep])
+    b = np.maximum(src[keep], dst[keep])
+    pairs = pd.DataFrame({"a": a, "b": b, "dist": d[keep]}).drop_duplicates(["a", "b"])
+    labels = df.index.to_numpy()
+    out = pd.DataFrame(
+        {
+            "id": labels[pairs["a"].to_numpy()],
+            "neighbour_id": labels[pairs["b"].to_numpy()],
+            "dist": pairs["dist"].to_numpy(),
+        }
+    )
+    return out.sort_values("dist", kind="stable").reset_index(drop=True)
+
+SYMMETRY_TOL_RATIO = 0.25     # match tolerance, share of the median hole spacing
+DELAY_TOL_MS = 1.0
+AXIS_STEP_DEG = 15
+
+def _match(xy: np.ndarray, image: np.ndarray, tol: float, tree=None):
+    """Index of the hole within `tol` of each mirrored point, or -1."""
+    from scipy.spatial import cKDTree
+    tree = tree if tree is not None else cKDTree(xy)
+    _, idx = tree.query(image, distance_upper_bound=tol, workers=-1)
+    return np.where(idx < len(xy), idx, -1)
+
+def _scores(idx: np.ndarray, delay: np.ndarray, delay_tol: float) -> Dict[str, float]:
+    ok = idx >= 0
+    n = len(idx)
+    same_delay = ok.copy()
+    same_delay[ok] = np.abs(delay[ok] - delay[idx[ok]]) <= delay_tol
+    return {
+        "geometry": float(ok.sum() / n) if n else 0.0,
+        "delay": float(same_delay.sum() / n) if n else 0.0,
+    }
+
+def _default_tol(xy: np.ndarray) -> float:
+    from scipy.spatial import cKDTree
+    if len(xy) < 2:
+        return 1e-6
+    d, _ = cKDTree(xy).query(xy, k=2, workers=-1)
+    d = d[:, 1][d[:, 1] > 0]
+    return SYMMETRY_TOL_RATIO * float(np.median(d)) if len(d) else 1e-6
+
+@profiled
+def symmetry_report(
+        df: pd.DataFrame,
+        tol: float | None = None,
+        axis_deg: float | None = None,
+        delay_tol: float = DELAY_TOL_MS) -> Dict[str, any]:
+    """Point and mirror symmetry of the pattern, geometry and delays.
+
+    Mirrored holes are matched to real holes with a KD-tree within `tol`
+    (default: a quarter of the median hole spacing), so surveyed
+    coordinates need not be exact. Mirror symmetry is tested about an axis
+    through the centroid at `axis_deg`, or the best of the principal axes
+    and every AXIS_STEP_DEG when not given. Runs in O(n log n) per axis.
+    """
+    from scipy.spatial import cKDTree
+    xy = df[["x", "y"]].to_numpy(dtype=float)
+    delay = df["delay"].to_numpy(dtype=float)
+    tol = _default_tol(xy) if tol is None else tol
+    centroid = xy.mean(axis=0)
+    tree = cKDTree(xy)
+
+    point = _scores(_match(xy, 2 * centroid - xy, tol, tree), delay, delay_tol)
+
+    if axis_deg is not None:
+        angles = [float(axis_deg)]
+    else:
+        angles = list(np.arange(0, 180, AXIS_STEP_DEG, dtype=float))
+        if len(xy) >= 2:
+            _, vecs = np.linalg.eigh(np.cov((xy - centroid).T))
+            angles += [float(np.degrees(np.arctan2(v[1], v[0])) % 180) for v in vecs.T]
+
+    v = xy - centroid
+    best_angle, best = None, {"geometry": -1.0, "delay": -1.0}
+    for a in angles:
+        u = np.array([np.cos(np.radians(a)), np.sin(np.radians(a))])
+        image = centroid + 2 * np.outer(v @ u, u) - v
+        sc = _scores(_match(xy, image, tol, tree), delay, delay_tol)
+        if (sc["geometry"], sc["delay"]) > (best["geometry"], best["delay"]):
+            best_angle, best = a, sc
+
+    return {
+        "tolerance": tol,
+        "point": point,
+        "mirror": best,
+        "mirror_axis_deg": best_angle,
+    }
+
+@profiled
+def symmetry_score(df: pd.DataFrame, tol: float | None = None) -> float:
+    """Point symmetry score 0-1: share of holes mirrored through the centroid
+    onto another hole within `tol`."""
+    xy = df[["x", "y"]].to_numpy(dtype=float)
+    if len(xy) == 0:
+        return 0.0
+    tol = _default_tol(xy) if tol is None else tol
+    idx = _match(xy, 2 * xy.mean(axis=0) - xy, tol)
+    return float((idx >= 0).sum() / len(xy))
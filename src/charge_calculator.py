@@ -1,14 +1,39 @@
 import streamlit as st
 import pathlib, json
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
 from src.blast_math import (
     linear_charge,
     hole_charge_mass,
     total_charge_mass,
     spacing,
     burden,
+    sweep_front,
+    sweep_size,
+    rank_designs,
+    POWDER_FACTOR_KG_T,
+    MAX_SWEEP_CANDIDATES,
 )
+from src.config import DEFAULT_HOLE_DIAMETER, DEFAULT_EXPLOSIVE_DENSITY, DEFAULT_HOLE_DEPTH
+from src.plotting import lod_indices
 
 TEXT = st.session_state.text
+TOP_DESIGNS = 50
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_sweep(diameters: tuple, depths: tuple, densities: tuple, stemmings: tuple, pfs: tuple):
+    """Pareto front, top-ranked candidates and plot sample of one sweep."""
+    return sweep_front(diameters, depths, densities, stemmings, pfs, keep=TOP_DESIGNS)
+
+
+def sweep_axis(label: str, lo: float, hi: float, value: tuple, step: float, steps: int, key: str) -> tuple:
+    """Range slider + number of values; returns the swept values."""
+    c1, c2 = st.columns([3, 1])
+    a, b = c1.slider(label, lo, hi, value, step=step, key=f"sweep_{key}")
+    n = c2.number_input(TEXT["sweep_steps"], min_value=1, max_value=50, value=steps, key=f"sweep_{key}_n")
+    return tuple(np.linspace(a, b, n).round(4))
 
 # -----------------------------------------------------------
 # Page
@@ -20,22 +45,22 @@ with st.form("charge_calc"):
 
     hole_diameter_mm = c1.number_input(
         TEXT["hole_diameter"],
-        value=st.session_state.get("hole_diameter", 51),
+        value=st.session_state.get("hole_diameter", DEFAULT_HOLE_DIAMETER),
         step=1,
     )
     hole_depth_m = c1.number_input(
         TEXT["hole_depth"],
-        value=st.session_state.get("hole_depth", 4.0),
+        value=st.session_state.get("hole_depth", DEFAULT_HOLE_DEPTH),
         step=0.1,
     )
     explosive_density = c2.number_input(
         TEXT["explosive_density"],
-        value=st.session_state.get("explosive_density", 1.15),
+        value=st.session_state.get("explosive_density", DEFAULT_EXPLOSIVE_DENSITY),
         step=0.01,
     )
     stemming_length_m = c1.number_input(
         TEXT["stemming_length"],
-        value=0.51,
+        value=st.session_state.get("stemming_length", 0.51),
         step=0.01,
     )
     hole_count = c2.number_input(
@@ -43,6 +68,12 @@ with st.form("charge_calc"):
         value=62,
         step=1,
     )
+    powder_factor = c2.number_input(
+        TEXT["powder_factor"],
+        min_value=0.05,
+        value=st.session_state.get("powder_factor", POWDER_FACTOR_KG_T),
+        step=0.01,
+    )
 
     submitted = st.form_submit_button(TEXT["calculate"])
 
@@ -53,6 +84,8 @@ if submitted:
             "hole_diameter": hole_diameter_mm,
             "hole_depth": hole_depth_m,
             "explosive_density": explosive_density,
+            "stemming_length": stemming_length_m,
+            "powder_factor": powder_factor,
         }
     )
 
@@ -67,7 +100,7 @@ per_hole = hole_charge_mass(lin, charge_len)
 total = total_charge_mass(per_hole, hole_count)
 
 bench = hole_depth_m  # placeholder
-bur = burden(charge_len, lin, hole_depth_m)  # TODO: get the PF from the user
+bur = burden(charge_len, lin, hole_depth_m, powder_factor)
 spc = spacing(bur)
 
 col1, col2, col3 = st.columns(3)
@@ -90,3 +123,95 @@ st.session_state.update(
         "burden": bur,
     }
 )
+
+# -----------------------------------------------------------
+# Design sweep
+# -----------------------------------------------------------
+st.divider()
+st.subheader(TEXT["sweep_title"])
+st.caption(TEXT["sweep_hint"])
+
+with st.form("sweep"):
+    d0 = float(hole_diameter_mm)
+    diameters = sweep_axis(TEXT["hole_diameter"], 32.0, 300.0, (max(32.0, d0 - 20), min(300.0, d0 + 40)), 1.0, 8, "diameter")
+    depths = sweep_axis(TEXT["hole_depth"], 0.5, 30.0, (max(0.5, hole_depth_m - 1), min(30.0, hole_depth_m + 2)), 0.1, 6, "depth")
+    densities = sweep_axis(TEXT["explosive_density"], 0.5, 1.6, (0.85, 1.25), 0.01, 5, "density")
+    stemmings = sweep_axis(TEXT["stemming_length"], 0.0, 5.0, (0.3, 1.2), 0.05, 5, "stemming")
+    pfs = sweep_axis(TEXT["powder_factor"], 0.05, 2.0, (0.3, 0.7), 0.01, 9, "pf")
+    run_sweep = st.form_submit_button(TEXT["sweep_run"])
+
+if run_sweep:
+    # whole millimetres, as on the form above
+    args = (tuple(np.unique(np.round(diameters))), depths, densities, stemmings, pfs)
+    n_candidates = sweep_size(*args)
+    if n_candidates > MAX_SWEEP_CANDIDATES:
+        st.warning(TEXT["sweep_too_large"].format(n=n_candidates, limit=MAX_SWEEP_CANDIDATES))
+    else:
+        st.session_state.sweep_args = args
+
+result = None
+if "sweep_args" in st.session_state:
+    with st.spinner(TEXT["sweep_running"]):
+        result = cached_sweep(*st.session_state.sweep_args)
+
+if result is not None and result.candidates == 0:
+    st.warning(TEXT["sweep_empty"])
+elif result is not None:
+    table = result.designs
+    front = table[table["pareto"]].sort_values("kg_per_t")
+    m1, m2 = st.columns(2)
+    m1.metric(TEXT["sweep_candidates"], f"{result.candidates:,}")
+    m2.metric(TEXT["sweep_pareto"], f"{len(front):,}")
+
+    sample = result.sample
+    shown = lod_indices(sample["kg_per_t"].to_numpy(), sample["drill_m_per_t"].to_numpy())
+    fig = go.Figure()
+    fig.add_trace(
+        go.Scattergl(
+            x=sample["kg_per_t"].to_numpy()[shown],
+            y=sample["drill_m_per_t"].to_numpy()[shown],
+            mode="markers",
+            marker=dict(color="lightgrey", size=4),
+            name=TEXT["sweep_candidates"],
+        )
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=front["kg_per_t"],
+            y=front["drill_m_per_t"],
+            mode="lines+markers",
+            marker=dict(color="crimson", size=7),
+            name=TEXT["sweep_pareto"],
+        )
+    )
+    fig.update_layout(
+        height=450,
+        margin=dict(l=0, r=0, t=10, b=0),
+        xaxis_title=TEXT["kg_per_t"],
+        yaxis_title=TEXT["drill_m_per_t"],
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    # ranking is a cheap vectorized score, so it follows the slider live
+    weight = st.slider(TEXT["sweep_weight"], 0.0, 1.0, 0.5, 0.05)
+    pareto_only = st.toggle(TEXT["sweep_pareto_only"], value=True)
+    # table holds every design that can make the top TOP_DESIGNS; scores use
+    # the ranges of the whole sweep
+    pool = front if pareto_only else table
+    score = rank_designs(pool, weight, result.ranges)
+    top = pool.assign(score=score).nsmallest(TOP_DESIGNS, "score")
+    st.dataframe(top, use_container_width=True, hide_index=False)
+
+    choice = st.selectbox(TEXT["sweep_pick"], top.index, format_func=lambda i: f"#{i}")
+    if st.button(TEXT["sweep_apply"]):
+        row = top.loc[choice]
+        st.session_state.update(
+            {
+                "hole_diameter": int(round(row["hole_diameter"])),
+                "hole_depth": float(row["hole_depth"]),
+                "explosive_density": float(row["explosive_density"]),
+                "stemming_length": float(row["stemming_length"]),
+                "powder_factor": float(row["powder_factor"]),
+            }
+        )
+        st.rerun()
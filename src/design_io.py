@@ -0,0 +1,282 @@
+"""
+Binary project files.
+A project holds the hole table, the design parameters of the Charge
+Calculator and Grid Design pages, and the kriged surfaces cached for that
+design. Two containers are supported:
+  .blast  NumPy NPZ (uncompressed), always available
+  .arrow  Arrow IPC file, when pyarrow is installed
+Both are read without parsing text; hole columns are memory-mapped when
+reading from a path and wrap the upload buffer when reading from memory.
+"""
+
+from typing import Dict, List, Tuple
+import io
+import json
+import os
+import zipfile
+
+import numpy as np
+
+from src.holeset import HoleSet
+from src.pattern import LAYOUTS
+from src.profiling import profiled
+
+FORMAT_VERSION = 1
+
+# session-state keys saved with a project
+DESIGN_PARAMS = (
+    # Charge Calculator
+    "hole_diameter",
+    "hole_depth",
+    "explosive_density",
+    "stemming_length",
+    "powder_factor",
+    "spacing",
+    "burden",
+    # Grid Design
+    "points_per_row",
+    "row_count",
+    "point_spacing",
+    "row_spacing",
+    "rotation",
+    "layout",
+    "bench_polygon",
+)
+
+# type each saved parameter must have; ints are widened for float inputs
+PARAM_TYPES = {
+    "hole_diameter": int,
+    "hole_depth": float,
+    "explosive_density": float,
+    "stemming_length": float,
+    "powder_factor": float,
+    "spacing": float,
+    "burden": float,
+    "points_per_row": int,
+    "row_count": int,
+    "point_spacing": float,
+    "row_spacing": float,
+    "rotation": int,
+    "layout": str,
+    "bench_polygon": str,
+}
+
+# extension -> mime type
+PROJECT_FORMATS = {
+    "blast": "application/octet-stream",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+Surface = Tuple[tuple, np.ndarray, np.ndarray]    # (cache key, z, variance)
+
+
+def design_params(state) -> Dict[str, object]:
+    """The saved subset of a session state (or any mapping)."""
+    return {k: state[k] for k in DESIGN_PARAMS if k in state}
+
+
+def checked_params(params) -> Dict[str, object]:
+    """The design parameters of a loaded project that are safe to put in
+    session state: known keys (DESIGN_PARAMS) with values of the expected
+    type. Anything else in the file is dropped."""
+    out = {}
+    if not isinstance(params, dict):
+        return out
+    for key in DESIGN_PARAMS:
+        value = params.get(key)
+        kind = PARAM_TYPES[key]
+        if isinstance(value, bool):
+            continue
+        if kind is float and isinstance(value, int):
+            value = float(value)
+        if not isinstance(value, kind):
+            continue
+        if kind is float and not np.isfinite(value):
+            continue
+        if key == "layout" and value not in LAYOUTS:
+            continue
+        out[key] = value
+    return out
+
+
+def _pyarrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def available_formats() -> List[str]:
+    return [f for f in PROJECT_FORMATS if f != "arrow" or _pyarrow_available()]
+
+
+def _json_default(o):
+    if isinstance(o, np.generic):
+        return o.item()
+    raise TypeError(f"{type(o).__name__} is not JSON serializable")
+
+
+def _meta(params: Dict[str, object], surfaces: List[Surface]) -> bytes:
+    meta = {
+        "version": FORMAT_VERSION,
+        "params": params,
+        "surfaces": [list(key) for key, _, _ in surfaces],
+        "shapes": [list(np.shape(z)) for _, z, _ in surfaces],
+    }
+    return json.dumps(meta, default=_json_default).encode("utf-8")
+
+
+# ---------- save ----------
+@profiled
+def save_project(
+        holes: HoleSet,
+        params: Dict[str, object] | None = None,
+        surfaces: List[Surface] | None = None,
+        fmt: str = "blast") -> bytes:
+    """Serialize a project to bytes in the `fmt` container."""
+    params = params or {}
+    surfaces = surfaces or []
+    meta = _meta(params, surfaces)
+
+    if fmt == "arrow":
+        return _save_arrow(holes, meta, surfaces)
+    if fmt != "blast":
+        raise ValueError(f"Unknown project format '{fmt}'")
+
+    arrays = {
+        "meta": np.frombuffer(meta, dtype=np.uint8),
+        "id": holes.ids,
+        "x": holes.x,
+        "y": holes.y,
+        "delay": holes.delay,
+    }
+    for i, (_, z, ss) in enumerate(surfaces):
+        arrays[f"surface{i}_z"] = z
+        arrays[f"surface{i}_ss"] = ss
+    buf = io.BytesIO()
+    np.savez(buf, **arrays)           # ZIP_STORED: members stay mappable
+    return buf.getvalue()
+
+
+def _save_arrow(holes: HoleSet, meta: bytes, surfaces: List[Surface]) -> bytes:
+    """Record batch 0 holds the holes; batch i + 1 holds surface i as a
+    single row of flattened z / ss lists (shapes are in the metadata)."""
+    import pyarrow as pa
+    value = pa.from_numpy_dtype(holes.dtype)
+    grid = pa.large_list(pa.float64())
+    schema = pa.schema(
+        [("id", pa.int64()), ("x", value), ("y", value), ("delay", value), ("z", grid), ("ss", grid)],
+        metadata={b"blast.meta": meta},
+    )
+    n = len(holes)
+    batches = [
+        pa.record_batch([holes.ids, holes.x, holes.y, holes.delay, pa.nulls(n, grid), pa.nulls(n, grid)], schema=schema)
+    ]
+    for _, z, ss in surfaces:
+        cells = [
+            pa.LargeListArray.from_arrays([0, a.size], np.ascontiguousarray(a, dtype=np.float64).ravel())
+            for a in (z, ss)
+        ]
+        no_holes = [pa.nulls(1, schema.field(c).type) for c in ("id", "x", "y", "delay")]
+        batches.append(pa.record_batch(no_holes + cells, schema=schema))
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+# ---------- load ----------
+def _npz_members(source) -> Dict[str, np.ndarray]:
+    """Arrays of an uncompressed NPZ without copying their data.
+    Paths are memory-mapped; in-memory buffers are wrapped with frombuffer."""
+    is_path = isinstance(source, (str, os.PathLike))
+    if is_path:
+        fh = open(source, "rb")
+        buffer = None
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        buffer = memoryview(source)
+        fh = io.BytesIO(buffer)
+    else:
+        buffer = source.getbuffer() if hasattr(source, "getbuffer") else memoryview(source.read())
+        fh = source if hasattr(source, "getbuffer") else io.BytesIO(buffer)
+        fh.seek(0)
+
+    out = {}
+    with zipfile.ZipFile(fh) as zf:
+        for info in zf.infolist():
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                with zf.open(info) as member:
+                    out[name] = np.lib.format.read_array(member)
+                continue
+            # local file header: 30 bytes + file name + extra field
+            fh.seek(info.header_offset)
+            head = fh.read(30)
+            start = info.header_offset + 30 + int.from_bytes(head[26:28], "little") + int.from_bytes(head[28:30], "little")
+            fh.seek(start)
+            version = np.lib.format.read_magic(fh)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(fh)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(fh)
+            offset = fh.tell()
+            order = "F" if fortran else "C"
+            if is_path:
+                out[name] = np.memmap(source, dtype=dtype, mode="r", offset=offset, shape=shape, order=order)
+            else:
+                count = int(np.prod(shape))
+                a = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+                out[name] = a.reshape(shape, order=order)
+    if is_path:
+        fh.close()
+    return out
+
+
+def _load_arrow(source) -> Tuple[Dict[str, np.ndarray], Dict[str, object], List[Surface]]:
+    import pyarrow as pa
+    if isinstance(source, (str, os.PathLike)):
+        reader = pa.ipc.open_file(pa.memory_map(str(source), "r"))
+    else:
+        data = source if isinstance(source, (bytes, bytearray, memoryview)) else (
+            source.getbuffer() if hasattr(source, "getbuffer") else source.read()
+        )
+        reader = pa.ipc.open_file(pa.py_buffer(data))
+    meta = json.loads(reader.schema.metadata[b"blast.meta"])
+    holes = reader.get_batch(0)
+    cols = {c: holes.column(c).to_numpy() for c in ("id", "x", "y", "delay")}
+    surfaces = []
+    for i, (key, shape) in enumerate(zip(meta["surfaces"], meta["shapes"])):
+        batch = reader.get_batch(i + 1)
+        z, ss = (batch.column(c).flatten().to_numpy().reshape(shape) for c in ("z", "ss"))
+        surfaces.append((tuple(key), z, ss))
+    return cols, meta, surfaces
+
+
+@profiled
+def load_project(source, fmt: str | None = None) -> Tuple[HoleSet, Dict[str, object], List[Surface]]:
+    """
+    Read a project from a path, bytes-like upload or file object.
+    fmt : "blast" or "arrow"; guessed from the file name when None
+    returns : (holes, design parameters, surfaces); only the known design
+              parameters are returned (see checked_params)
+    """
+    if fmt is None:
+        name = str(getattr(source, "name", source if isinstance(source, (str, os.PathLike)) else ""))
+        fmt = "arrow" if name.endswith(".arrow") else "blast"
+
+    if fmt == "arrow":
+        cols, meta, surfaces = _load_arrow(source)
+    else:
+        cols = _npz_members(source)
+        meta = json.loads(bytes(cols["meta"]))
+        surfaces = [
+            (tuple(key), cols[f"surface{i}_z"], cols[f"surface{i}_ss"])
+            for i, key in enumerate(meta["surfaces"])
+        ]
+
+    if meta.get("version", 0) > FORMAT_VERSION:
+        raise ValueError(f"Project format v{meta['version']} is newer than this app (v{FORMAT_VERSION}).")
+    holes = HoleSet(cols["x"], cols["y"], cols["delay"], cols["id"])
+    return holes, checked_params(meta.get("params")), surfaces
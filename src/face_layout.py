@@ -0,0 +1,192 @@
+"""
+Vectorized underground face layout.
+A drift profile (rectangular, arched or any polygon) is inset by the
+stand-offs, then filled with three hole classes, each with its own burden
+and spacing:
+  lifter     along the floor
+  contour    along the walls and roof
+  production inside the remaining core
+The cut is shifted onto the face in one step and production holes inside
+its clearance are removed. Everything is NumPy array arithmetic, so a layout
+takes well under a millisecond to rebuild on every slider change.
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+from src.pattern import fill_polygon
+from src.profiling import profiled
+
+PROFILES = ("rectangular", "arched", "polygon")
+HOLE_CLASSES = ("production", "contour", "lifter", "cut")
+
+ARC_SEGMENTS: int = 32          # vertices used to approximate an arched roof
+FLOOR_NY: float = 0.7           # edges whose inward normal points up more than this are floor
+ROOF_NY: float = -0.7           # ... and down more than this are roof
+
+# burn cut relative to its centre (m)
+CUT_A: float = 0.250
+CUT_B: float = 0.300
+CUT_PATTERN = np.array([
+    (0, 0), (0, CUT_A), (CUT_A, 0), (0, -CUT_A), (-CUT_A, 0),
+    (CUT_A, CUT_A), (-CUT_A, -CUT_A), (CUT_A, -CUT_A), (-CUT_A, CUT_A),
+    (0, CUT_A + CUT_B), (0, -CUT_A - CUT_B), (CUT_A + CUT_B, 0), (-CUT_A - CUT_B, 0),
+], dtype=float)
+
+
+# ---------- profiles ----------
+def _area(polygon: np.ndarray) -> float:
+    """Signed area (shoelace), positive for counter-clockwise polygons."""
+    x, y = polygon[:, 0], polygon[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+def _ccw(polygon: np.ndarray) -> np.ndarray:
+    """Counter-clockwise copy of a polygon."""
+    return polygon if _area(polygon) > 0 else polygon[::-1].copy()
+
+
+def drift_profile(
+        width: float,
+        height: float,
+        profile: str = "arched",
+        arch_rise: float | None = None,
+        polygon: np.ndarray | None = None) -> np.ndarray:
+    """
+    Counter-clockwise outline of the drift, floor first.
+    arched : vertical walls up to the springline and a circular-segment roof
+             rising `arch_rise` (default width / 4) to `height`
+    polygon: `polygon` vertices as given (any orientation)
+    """
+    if profile == "polygon":
+        if polygon is None or len(polygon) < 3:
+            raise ValueError("A polygon profile needs at least 3 vertices")
+        return _ccw(np.asarray(polygon, dtype=float))
+    if profile == "rectangular":
+        return np.array([(0, 0), (width, 0), (width, height), (0, height)], dtype=float)
+    if profile != "arched":
+        raise ValueError(f"Unknown profile '{profile}'")
+
+    rise = min(width / 4 if arch_rise is None else arch_rise, height, width / 2)
+    if rise <= 0:
+        return drift_profile(width, height, "rectangular")
+    spring = height - rise
+    radius = (width ** 2 / 4 + rise ** 2) / (2 * rise)
+    cx, cy = width / 2, height - radius
+    half = np.arcsin(min(width / (2 * radius), 1.0))
+    t = np.linspace(np.pi / 2 - half, np.pi / 2 + half, ARC_SEGMENTS + 1)
+    arc = np.column_stack([cx + radius * np.cos(t), cy + radius * np.sin(t)])
+    arc[0] = (width, spring)           # close exactly on the walls
+    arc[-1] = (0, spring)
+    return np.vstack([[(0, 0), (width, 0)], arc])
+
+
+# ---------- geometry helpers ----------
+def _edges(polygon: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Edge start points, unit directions and inward unit normals (CCW polygon)."""
+    start = polygon
+    d = np.roll(polygon, -1, axis=0) - polygon
+    length = np.hypot(d[:, 0], d[:, 1])
+    u = d / np.where(length > 0, length, 1.0)[:, None]
+    normal = np.column_stack([-u[:, 1], u[:, 0]])
+    return start, u, normal
+
+
+def edge_offsets(polygon: np.ndarray, floor: float, side: float, roof: float) -> np.ndarray:
+    """Per-edge distance: `floor`, `side` or `roof` by the edge's inward normal."""
+    _, _, normal = _edges(polygon)
+    ny = normal[:, 1]
+    return np.where(ny > FLOOR_NY, floor, np.where(ny < ROOF_NY, roof, side))
+
+
+def inset(polygon: np.ndarray, distance) -> np.ndarray:
+    """
+    Polygon with every edge moved inward by `distance` (scalar or per edge),
+    vertices at the intersections of neighbouring offset edges. Exact for
+    convex profiles; a good approximation for mildly concave ones.
+    """
+    start, u, normal = _edges(polygon)
+    a = start + normal * np.broadcast_to(np.asarray(distance, dtype=float), len(polygon))[:, None]
+    # vertex i: intersection of offset edge i-1 with offset edge i
+    a_prev, u_prev = np.roll(a, 1, axis=0), np.roll(u, 1, axis=0)
+    cross = u_prev[:, 0] * u[:, 1] - u_prev[:, 1] * u[:, 0]
+    diff = a - a_prev
+    t = (diff[:, 0] * u[:, 1] - diff[:, 1] * u[:, 0]) / np.where(np.abs(cross) > 1e-12, cross, 1.0)
+    return np.where((np.abs(cross) > 1e-12)[:, None], a_prev + t[:, None] * u_prev, a)
+
+
+def resample(path: np.ndarray, step: float) -> np.ndarray:
+    """Evenly spaced points along an open polyline, both ends included,
+    at most `step` apart."""
+    seg = np.hypot(*np.diff(path, axis=0).T)
+    s = np.concatenate([[0.0], np.cumsum(seg)])
+    n = max(int(np.ceil(s[-1] / step)), 1) + 1
+    t = np.linspace(0.0, s[-1], n)
+    return np.column_stack([np.interp(t, s, path[:, 0]), np.interp(t, s, path[:, 1])])
+
+
+def _floor_edge(polygon: np.ndarray) -> int:
+    _, _, normal = _edges(polygon)
+    return int(np.argmax(normal[:, 1]))
+
+
+# ---------- layout ----------
+@profiled
+def face_layout(
+        outline: np.ndarray,
+        spacing: float,
+        burden: float,
+        contour_spacing: float,
+        contour_burden: float,
+        lifter_spacing: float,
+        lifter_burden: float,
+        bottom_stand_off: float = 0.3,
+        side_stand_off: float = 0.2,
+        top_stand_off: float = 0.2,
+        cut_offset: Tuple[float, float] | None = None,
+        layout: str = "square") -> Dict[str, np.ndarray]:
+    """
+    Holes of a drift face.
+    outline          : CCW drift profile (see drift_profile)
+    spacing, burden  : production pattern (m)
+    contour_*        : spacing along the walls / roof and burden to the core
+    lifter_*         : spacing along the floor and burden to the core
+    cut_offset       : centre of the burn cut, None for no cut
+    returns : {hole class: (n, 2) array of x, y}
+    """
+    # perimeter holes sit on the profile inset by the stand-offs
+    ring = inset(outline, edge_offsets(outline, bottom_stand_off, side_stand_off, top_stand_off))
+    k = _floor_edge(ring)
+    n = len(ring)
+    floor = ring[[k, (k + 1) % n]]
+    lifter = resample(floor, lifter_spacing)
+    # walls and roof: from the end of the floor edge round to its start,
+    # without the two floor corners already drilled as lifters
+    order = (np.arange(n) + k + 1) % n
+    contour = resample(ring[order], contour_spacing)[1:-1]
+
+    # production core: the ring inset by the lifter / contour burdens
+    core = inset(ring, edge_offsets(ring, lifter_burden, contour_burden, contour_burden))
+    if _area(core) > 0:
+        px, py = fill_polygon(core, spacing, burden, 0.0, layout)
+        production = np.column_stack([px, py])
+    else:                              # burdens wider than the face: no core left
+        production = np.empty((0, 2))
+
+    cut = np.empty((0, 2))
+    if cut_offset is not None:
+        cut = CUT_PATTERN + np.asarray(cut_offset, dtype=float)
+        clearance = np.hypot(*CUT_PATTERN.T).max() + burden / 2
+        keep = np.hypot(*(production - cut[0]).T) > clearance
+        production = production[keep]
+
+    return {"production": production, "contour": contour, "lifter": lifter, "cut": cut}
+
+
+def stack_layout(holes: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """All holes as one (n, 2) array plus the class index of each row
+    (position in HOLE_CLASSES)."""
+    xy = np.vstack([holes[c] for c in HOLE_CLASSES])
+    cls = np.repeat(np.arange(len(HOLE_CLASSES)), [len(holes[c]) for c in HOLE_CLASSES])
+    return xy, cls
@@ -1,9 +1,12 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import math
+import plotly.graph_objects as go
 from pathlib import Path
+from src.holeset import HoleSet
+from src.pattern import LAYOUTS, grid_pattern, fill_polygon, parse_polygon
+from src.plotting import hole_traces, detail_region, apply_bounds, lod_caption
+from src.profiling import stage
 
 # ------------------------------------------------------------------
 # 1. Language already injected in main.py
@@ -19,6 +22,8 @@ defaults = {
     "point_spacing": st.session_state.get("spacing", 1.0),      # m
     "row_spacing": st.session_state.get("burden", 1.1),         # m
     "rotation": 0,                                              # deg
+    "layout": "square",
+    "bench_polygon": "",
 }
 for k, v in defaults.items():
     st.session_state.setdefault(k, v)
@@ -61,6 +66,18 @@ with st.sidebar:
         max_value=360,
         value=st.session_state.rotation,
     )
+    layout = st.selectbox(
+        TEXT["layout"],
+        LAYOUTS,
+        index=LAYOUTS.index(st.session_state.layout),
+        format_func=lambda k: TEXT[f"layout_{k}"],
+    )
+    with st.expander(TEXT["bench_polygon"]):
+        bench_polygon = st.text_area(
+            TEXT["bench_polygon_hint"],
+            value=st.session_state.bench_polygon,
+            height=150,
+        )
 
 # Persist sidebar choices
 st.session_state.update(
@@ -70,25 +87,30 @@ st.session_state.update(
         "point_spacing": point_spacing,
         "row_spacing": row_spacing,
         "rotation": rotation,
+        "layout": layout,
+        "bench_polygon": bench_polygon,
     }
 )
 
 # ------------------------------------------------------------------
 # 4. Geometry generation
 # ------------------------------------------------------------------
-theta = math.radians(rotation)
-cos_t, sin_t = math.cos(theta), math.sin(theta)
+try:
+    polygon = parse_polygon(bench_polygon)
+except ValueError:
+    st.sidebar.error(TEXT["bad_polygon"])
+    polygon = None
 
-coords = []
-for i in range(row_count):
-    for j in range(points_per_row):
-        x0 = j * point_spacing
-        y0 = i * row_spacing
-        x = x0 * cos_t - y0 * sin_t
-        y = x0 * sin_t + y0 * cos_t
-        coords.append((x, y, 0.0))
+if polygon is not None:
+    try:
+        x, y = fill_polygon(polygon, point_spacing, row_spacing, rotation, layout)
+    except ValueError as e:
+        st.error(TEXT["pattern_too_large"].format(err=e))
+        st.stop()
+else:
+    x, y = grid_pattern(points_per_row, row_count, point_spacing, row_spacing, rotation, layout)
 
-df = pd.DataFrame(coords, columns=["x", "y", "delay"])
+df = pd.DataFrame({"x": x, "y": y, "delay": np.zeros(len(x))})
 
 # ------------------------------------------------------------------
 # 5. Layout
@@ -103,26 +125,35 @@ with col_table:
     st.dataframe(df, use_container_width=True)
 
     if st.button(TEXT["save_grid"], use_container_width=True):
-        st.session_state.df = df
+        st.session_state.holes = HoleSet.from_frame(df)
         st.success(TEXT["saved_ok"])
 
 with col_plot:
-    fig = px.scatter(df, x="x", y="y", text=df.index)
-    fig.update_traces(
+    bounds = detail_region(df["x"], df["y"], TEXT, key="grid_detail")
+    traces, lod = hole_traces(
+        df["x"],
+        df["y"],
+        labels=df.index,
+        ids=df.index,
+        bounds=bounds,
         marker=dict(color="royalblue", size=10, line=dict(width=1, color="black")),
-        textposition="top center",
     )
+    fig = go.Figure(traces)
     fig.update_layout(
+        showlegend=False,
         height=600,
         margin=dict(l=0, r=0, t=0, b=0),
         xaxis=dict(scaleanchor="y", scaleratio=1, visible=False),
         yaxis=dict(visible=False),
     )
-    st.plotly_chart(fig, use_container_width=True)
+    apply_bounds(fig, bounds)
+    with stage("plot"):
+        st.plotly_chart(fig, use_container_width=True)
+    lod_caption(lod, TEXT)
 
 # ------------------------------------------------------------------
 # 6. Clear button
 # ------------------------------------------------------------------
 if st.button(TEXT["clear_grid"], use_container_width=True):
-    st.session_state.df = None
+    st.session_state.holes = None
     st.rerun()
\ No newline at end of file
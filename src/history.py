@@ -0,0 +1,174 @@
+"""
+Undo / redo for hole-table edits.
+Each edit is stored as a delta holding only the rows it touched, so memory
+per edit is proportional to the edit, not to the design. Whole-table
+replacements are stored as snapshots (references to immutable HoleSets).
+Applying, undoing or redoing a delta is not O(changed rows): HoleSets are
+immutable, so each step builds a new set with a copy of every column the
+delta touches, O(n) per step (2-10 ms at a million holes). The stacks
+hold no periodic snapshots; nothing needs replaying, since each step
+applies its own delta to the current set.
+"""
+
+from dataclasses import dataclass
+from collections import deque
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.holeset import HoleSet
+from src.profiling import profiled
+
+MAX_HISTORY = 30
+
+
+@dataclass
+class Delta:
+    """One edit. positions are row positions in the set the edit applies to."""
+    kind: str                                # "add" | "delete" | "set" | "replace" | "batch"
+    positions: np.ndarray
+    before: HoleSet | Dict[str, np.ndarray] | None = None   # delete / set / replace
+    after: HoleSet | Dict[str, np.ndarray] | None = None    # add / set / replace
+    ids: np.ndarray | None = None            # hole ids touched by a "set"
+    parts: List["Delta"] | None = None       # sub-edits of a "batch", in order
+
+    @property
+    def nbytes(self) -> int:
+        size = self.positions.nbytes
+        if self.parts:
+            size += sum(p.nbytes for p in self.parts)
+        for rows in (self.before, self.after):
+            if isinstance(rows, HoleSet):
+                size += rows.nbytes
+            elif rows is not None:
+                size += sum(a.nbytes for a in rows.values())
+        return size
+
+
+@profiled
+def apply_delta(holes: HoleSet, delta: Delta, reverse: bool = False) -> HoleSet:
+    """Return the hole set with `delta` applied (or undone when `reverse`)."""
+    kind = delta.kind
+    if kind == "batch":
+        for part in (reversed(delta.parts) if reverse else delta.parts):
+            holes = apply_delta(holes, part, reverse)
+        return holes
+    if kind == "replace":
+        return delta.before if reverse else delta.after
+    if kind == "set":
+        return holes.set(delta.positions, **(delta.before if reverse else delta.after))
+    if (kind == "add") != reverse:
+        rows = delta.after if kind == "add" else delta.before
+        return holes.insert(delta.positions, rows)
+    return holes.delete(delta.positions)
+
+
+# ---------- deltas from edits ----------
+def add_rows(holes: HoleSet, x, y, delay) -> Delta:
+    rows = holes.new_rows(x, y, delay)
+    return Delta("add", np.arange(len(holes), len(holes) + len(rows)), after=rows)
+
+
+def delete_rows(holes: HoleSet, positions) -> Delta:
+    positions = np.sort(np.asarray(positions, dtype=np.intp))
+    return Delta("delete", positions, before=holes.take(positions))
+
+
+def set_rows(holes: HoleSet, positions, **cols) -> Delta:
+    """Overwrite columns at `positions` (move / change delay)."""
+    positions = np.asarray(positions, dtype=np.intp)
+    before = {c: holes.column(c)[positions].copy() for c in cols}
+    after = {c: np.broadcast_to(np.asarray(v, dtype=holes.dtype), positions.shape).copy() for c, v in cols.items()}
+    return Delta("set", positions, before=before, after=after, ids=holes.ids[positions].copy())
+
+
+def batch_rows(
+        holes: HoleSet,
+        updates: pd.DataFrame | None = None,
+        deletes=None,
+        adds: pd.DataFrame | None = None) -> Delta:
+    """
+    Many edits as one undoable transaction, addressed by hole id.
+    updates : `id` plus any of x / y / delay; NaN leaves a value unchanged
+    deletes : ids to remove
+    adds    : x / y / delay of new holes (fresh ids are assigned)
+    Updates are applied first, then deletes, then adds.
+    """
+    parts: List[Delta] = []
+    cur = holes
+
+    def push(delta: Delta):
+        nonlocal cur
+        parts.append(delta)
+        cur = apply_delta(cur, delta)
+
+    if updates is not None and len(updates):
+        pos = cur.positions(updates["id"].to_numpy())
+        for col in ("x", "y", "delay"):
+            if col in updates.columns:
+                values = updates[col].to_numpy(dtype=float)
+                ok = ~np.isnan(values)
+                if ok.any():
+                    push(set_rows(cur, pos[ok], **{col: values[ok]}))
+    if deletes is not None and len(deletes):
+        push(delete_rows(cur, cur.positions(deletes)))
+    if adds is not None and len(adds):
+        push(add_rows(cur, adds["x"].to_numpy(), adds["y"].to_numpy(), adds["delay"].to_numpy()))
+    return Delta("batch", np.empty(0, dtype=np.intp), parts=parts)
+
+
+def replace_table(holes: HoleSet, new_holes: HoleSet) -> Delta:
+    # HoleSets are immutable, so the snapshot is just a reference
+    return Delta("replace", np.empty(0, dtype=np.intp), before=holes, after=new_holes)
+
+
+# ---------- history ----------
+class EditHistory:
+    """Bounded undo / redo stacks of deltas."""
+
+    def __init__(self, max_ops: int = MAX_HISTORY):
+        self.undo_stack: deque = deque(maxlen=max_ops)
+        self.redo_stack: deque = deque(maxlen=max_ops)
+        self.head: HoleSet | None = None    # set the stacks apply to
+
+    def track(self, holes: HoleSet | None) -> bool:
+        """Forget the history if `holes` was replaced outside this history.
+        Returns True when the history was reset."""
+        if holes is self.head:
+            return False
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.head = holes
+        return True
+
+    def apply(self, holes: HoleSet, delta: Delta) -> HoleSet:
+        """Apply a new edit and record it."""
+        self.head = apply_delta(holes, delta)
+        self.undo_stack.append(delta)
+        self.redo_stack.clear()
+        return self.head
+
+    def undo(self, holes: HoleSet) -> HoleSet:
+        delta = self.undo_stack.pop()
+        self.redo_stack.append(delta)
+        self.head = apply_delta(holes, delta, reverse=True)
+        return self.head
+
+    def redo(self, holes: HoleSet) -> HoleSet:
+        delta = self.redo_stack.pop()
+        self.undo_stack.append(delta)
+        self.head = apply_delta(holes, delta)
+        return self.head
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self.undo_stack)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self.redo_stack)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(d.nbytes for d in self.undo_stack) + sum(d.nbytes for d in self.redo_stack)
@@ -1,5 +1,9 @@
 import streamlit as st
 import pandas as pd
+from src.holeset import HoleSet
+from src.ingest import read_holes_csv
+from src.design_io import load_project, available_formats
+from src.kriging import shared_cache, trusted_surfaces
 
 TEXT = st.session_state.text
 
@@ -29,21 +33,45 @@ with col1:
     )
 
 with col2:
-    uploaded = st.file_uploader(TEXT["upload_label"], type="csv")
-    if uploaded:
+    uploaded = st.file_uploader(TEXT["upload_label"], type=["csv", *available_formats()])
+    # the uploader keeps its file across reruns: load each upload once, so
+    # later reruns do not reset the holes, parameters and edit history
+    new_upload = uploaded is not None and uploaded.file_id != st.session_state.get("loaded_file")
+    if new_upload and not uploaded.name.lower().endswith(".csv"):
         try:
             with st.spinner(TEXT["loading"]):
-                df = pd.read_csv(uploaded)
+                holes, params, surfaces = load_project(uploaded)
+            st.session_state.update(params)
+            trusted = trusted_surfaces(holes.to_frame(), surfaces)
+            for key, z, ss in trusted:
+                shared_cache().put(key, z, ss)
+            if len(trusted) < len(surfaces):
+                st.warning(TEXT["surfaces_skipped"].format(n=len(surfaces) - len(trusted)))
+            st.session_state.holes = holes
+            st.session_state.loaded_file = uploaded.file_id
+            st.success(TEXT["upload_success"].format(file=uploaded.name))
+        except Exception as e:
+            st.error(TEXT["upload_error"].format(err=e))
+    elif new_upload:
+        try:
+            bar = st.progress(0.0, text=TEXT["loading"])
+            holes, report = read_holes_csv(uploaded, progress=lambda f: bar.progress(f, text=TEXT["loading"]))
+            bar.empty()
 
-            missing = {"x", "y", "delay"} - set(df.columns)
-            if missing:
-                st.error(TEXT["missing_cols"].format(cols=", ".join(missing)))
+            if holes is None:
+                st.error(TEXT["missing_cols"].format(cols=", ".join(report["missing"])))
             else:
-                # Optional: coerce to numeric
-                df = df.apply(pd.to_numeric, errors="coerce")
-                if df.isna().any().any():
-                    st.warning(TEXT["nan_warning"])
-                st.session_state.df = df
+                if report["bad_rows"]:
+                    st.warning(
+                        TEXT["bad_rows_dropped"].format(
+                            n=report["bad_rows"],
+                            lines=", ".join(map(str, report["bad_lines"])),
+                        )
+                    )
+                if report["ids_dropped"]:
+                    st.warning(TEXT["ids_dropped"])
+                st.session_state.holes = holes
+                st.session_state.loaded_file = uploaded.file_id
                 st.success(TEXT["upload_success"].format(file=uploaded.name))
         except Exception as e:
             st.error(TEXT["upload_error"].format(err=e))
@@ -52,7 +80,7 @@ with col2:
 # 3. Clear grid
 # -----------------------------------------------------------
 if st.button(TEXT["clear_grid"], use_container_width=True):
-    st.session_state.df = None
+    st.session_state.holes = None
     st.rerun()
 
 st.info(TEXT["sidebar_note"], icon="ℹ️")
\ No newline at end of file
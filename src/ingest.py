@@ -0,0 +1,172 @@
+"""
+Streaming CSV ingest for hole tables.
+Only the x / y / delay (and optional id) columns are parsed, chunk by chunk,
+straight into preallocated float64 arrays, so peak memory stays close to the
+size of the final HoleSet even for multi-million-row drill logs.
+"""
+
+from typing import Callable, Dict, Iterator, List, Tuple
+import contextlib
+import csv
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.holeset import HoleSet, COLUMNS
+from src.profiling import profiled
+
+CHUNK_ROWS: int = 250_000
+ARROW_BLOCK_BYTES: int = 16 << 20
+MAX_REPORTED_LINES: int = 20
+
+
+def _open(source, stack: contextlib.ExitStack):
+    """Binary, seekable file object for a path, bytes or an uploaded file.
+    Files opened here are closed with `stack`; caller objects stay open."""
+    if isinstance(source, (str, os.PathLike)):
+        return stack.enter_context(open(source, "rb"))
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    return source
+
+
+def _header(buf) -> List[str]:
+    pos = buf.tell()
+    line = buf.readline().decode("utf-8-sig")
+    buf.seek(pos)
+    return [c.strip() for c in next(csv.reader([line]), [])]
+
+
+def _count_rows(buf, block: int = 1 << 24) -> int:
+    """Upper bound of data rows: the number of newlines in the file."""
+    pos = buf.tell()
+    n = 0
+    while chunk := buf.read(block):
+        n += chunk.count(b"\n")
+    buf.seek(pos)
+    return max(n, 1)
+
+
+def _pyarrow_available() -> bool:
+    try:
+        import pyarrow.csv  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _chunks(buf, cols: List[str], chunksize: int, engine: str) -> Iterator[pd.DataFrame]:
+    if engine == "pyarrow":
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+        # Columns are read as text: pyarrow infers types from the first block
+        # and would raise on a bad cell in a later one. Each batch is cast to
+        # float64 here, and a batch that fails the cast is handed on as text
+        # for the same per-cell coercion as the C engine.
+        reader = pacsv.open_csv(
+            buf,
+            read_options=pacsv.ReadOptions(block_size=ARROW_BLOCK_BYTES),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=cols,
+                column_types={c: pa.string() for c in cols},
+                strings_can_be_null=True,
+            ),
+        )
+        for batch in reader:
+            frame = {}
+            for c in cols:
+                col = batch.column(c)
+                try:
+                    frame[c] = col.cast(pa.float64()).to_numpy(zero_copy_only=False)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                    frame[c] = col.to_pandas()
+            yield pd.DataFrame(frame)
+    else:
+        yield from pd.read_csv(buf, usecols=cols, chunksize=chunksize, engine="c")
+
+
+@profiled
+def read_holes_csv(
+        source,
+        chunksize: int = CHUNK_ROWS,
+        engine: str = "auto",
+        drop_bad: bool = True,
+        progress: Callable[[float], None] | None = None) -> Tuple[HoleSet | None, Dict[str, object]]:
+    """
+    Read a hole CSV into a HoleSet.
+    engine   : "c", "pyarrow" or "auto" (pyarrow when installed)
+    drop_bad : drop rows whose x / y / delay is not a number (else keep as NaN)
+    progress : called with the fraction of rows read after every chunk
+    returns  : (holes or None if required columns are missing, report)
+    """
+    with contextlib.ExitStack() as stack:
+        return _read_holes(_open(source, stack), chunksize, engine, drop_bad, progress)
+
+
+def _read_holes(
+        buf,
+        chunksize: int,
+        engine: str,
+        drop_bad: bool,
+        progress: Callable[[float], None] | None) -> Tuple[HoleSet | None, Dict[str, object]]:
+    header = _header(buf)
+    report: Dict[str, object] = {
+        "missing": sorted(set(COLUMNS) - set(header)),
+        "rows": 0,
+        "bad_rows": 0,
+        "bad_lines": [],
+        "ids_dropped": False,
+    }
+    if report["missing"]:
+        return None, report
+
+    if engine == "auto":
+        engine = "pyarrow" if _pyarrow_available() else "c"
+    has_id = "id" in header
+    cols = list(COLUMNS) + (["id"] if has_id else [])
+
+    capacity = _count_rows(buf)
+    out = {c: np.empty(capacity, dtype=np.float64) for c in cols}
+    n_out = 0
+    n_read = 0
+    bad_lines: List[int] = []
+
+    for chunk in _chunks(buf, cols, chunksize, engine):
+        values = {}
+        for c in cols:
+            s = chunk[c]
+            if not pd.api.types.is_float_dtype(s) and not pd.api.types.is_integer_dtype(s):
+                s = pd.to_numeric(s, errors="coerce")
+            values[c] = s.to_numpy(dtype=np.float64, na_value=np.nan)
+
+        bad = np.isnan(values["x"]) | np.isnan(values["y"]) | np.isnan(values["delay"])
+        n_bad = int(bad.sum())
+        if n_bad:
+            report["bad_rows"] += n_bad
+            if len(bad_lines) < MAX_REPORTED_LINES:
+                # +2: one for the header, one for 1-based line numbers
+                bad_lines += (np.flatnonzero(bad)[:MAX_REPORTED_LINES] + n_read + 2).tolist()
+        keep = ~bad if drop_bad else np.ones(len(bad), dtype=bool)
+
+        k = int(keep.sum())
+        for c in cols:
+            out[c][n_out:n_out + k] = values[c][keep]
+        n_out += k
+        n_read += len(chunk)
+        if progress is not None:
+            progress(min(n_read / capacity, 1.0))
+
+    report["rows"] = n_out
+    report["bad_lines"] = bad_lines[:MAX_REPORTED_LINES]
+
+    ids = None
+    if has_id:
+        raw = out["id"][:n_out]
+        if not np.isnan(raw).any() and pd.Index(raw).is_unique:
+            ids = raw.astype(np.int64)
+        else:
+            report["ids_dropped"] = True
+    # slices are views: no copy of the filled arrays
+    return HoleSet(out["x"][:n_out], out["y"][:n_out], out["delay"][:n_out], ids), report
@@ -0,0 +1,474 @@
+"""
+Kriging helpers for the Analyze page.
+Kriged delay surfaces are cached by content so Streamlit reruns that only
+change the display (colour scale, spacing / burden…) do not re-krige.
+"""
+
+from typing import Dict, List, Tuple
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.profiling import profiled
+
+# ---------- constants ----------
+CACHE_BUDGET_BYTES: int = 256 * 1024 ** 2   # 256 MB shared by all sessions
+DEFAULT_NEIGHBOURS: int = 24                 # holes per local kriging system
+VARIOGRAM_SAMPLE: int = 2000                 # max holes used to fit the variogram
+TILE_NODES: int = 2048                       # grid nodes solved per batch
+LOCAL_TOLERANCE: float = 0.05                # max |local - global|, as a share of the delay range
+LOCAL_MIN_HOLES: int = 500                   # smaller patterns are always kriged globally
+WINDOW_DEVIATION: float = 0.20               # window vs global, worst case on datas/ at 24 neighbours (0.19)
+NODE_BUDGET: int = 10_000                    # max kriged nodes per surface
+NODES_PER_SPACING: float = 2.0               # coarse grid nodes per hole spacing
+MIN_AXIS_NODES: int = 10
+REFINE_FACTOR: int = 2                       # fine cells per coarse cell (each axis)
+
+
+# ---------- keys ----------
+def design_hash(df: pd.DataFrame, cols=("x", "y", "delay")) -> str:
+    """Content hash of the hole table (row order matters, index does not)."""
+    h = pd.util.hash_pandas_object(df[list(cols)], index=False).to_numpy()
+    return hashlib.sha1(h.tobytes()).hexdigest()
+
+
+def grid_key(gridx: np.ndarray, gridy: np.ndarray) -> str:
+    """Hash of the grid node coordinates."""
+    h = hashlib.sha1()
+    for g in (gridx, gridy):
+        g = np.ascontiguousarray(g, dtype=float)
+        h.update(str(g.shape).encode())
+        h.update(g.tobytes())
+    return h.hexdigest()
+
+
+# ---------- cache ----------
+class KrigingCache:
+    """Thread-safe LRU cache of (z, variance) grids with a byte budget."""
+
+    def __init__(self, budget_bytes: int = CACHE_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self.nbytes = 0
+        self._items: "OrderedDict[Tuple, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Tuple):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def put(self, key: Tuple, z: np.ndarray, ss: np.ndarray) -> None:
+        size = z.nbytes + ss.nbytes
+        if size > self.budget_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[0].nbytes + old[1].nbytes
+            self._items[key] = (z, ss)
+            self.nbytes += size
+            while self.nbytes > self.budget_bytes:
+                _, (oz, oss) = self._items.popitem(last=False)
+                self.nbytes -= oz.nbytes + oss.nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._items), "bytes": self.nbytes, "budget": self.budget_bytes}
+
+    def entries(self, design: str):
+        """(key, z, variance) of every cached surface of one design hash."""
+        with self._lock:
+            return [(k, z, ss) for k, (z, ss) in self._items.items() if k[0] == design]
+
+
+_shared: KrigingCache | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache() -> KrigingCache:
+    """The process-wide cache, shared by every Streamlit session."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = KrigingCache()
+        return _shared
+
+
+# ---------- global kriging ----------
+@profiled
+def krige_grid(
+        df: pd.DataFrame,
+        variogram_model: str,
+        gridx: np.ndarray,
+        gridy: np.ndarray,
+        cache: KrigingCache | None = None,
+        n_neighbours: int | None = None,
+        workers: int | None = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ordinary Kriging of `delay` on the (gridx, gridy) grid.
+    n_neighbours : None for a global solve over all holes, else use the
+                   local moving-window engine (see `krige_local`)
+    returns      : (z, variance), both shaped (len(gridy), len(gridx))
+    """
+    key = (design_hash(df), variogram_model, grid_key(gridx, gridy), n_neighbours)
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+
+    if n_neighbours is None:
+        from pykrige.ok import OrdinaryKriging
+        ok = OrdinaryKriging(df["x"], df["y"], df["delay"], variogram_model=variogram_model)
+        z, ss = ok.execute("grid", gridx, gridy)
+    else:
+        z, ss = krige_local(df, variogram_model, gridx, gridy, n_neighbours, workers)
+    z, ss = np.asarray(z, dtype=float), np.asarray(ss, dtype=float)
+    # Cached arrays are shared between sessions: make them read-only.
+    z.setflags(write=False)
+    ss.setflags(write=False)
+
+    if cache is not None:
+        cache.put(key, z, ss)
+    return z, ss
+
+
+# ---------- local (moving-window) kriging ----------
+# Each grid node is kriged from its `n_neighbours` nearest holes only, found
+# with a KD-tree. The small systems are solved in batches (tiles) and tiles
+# are spread over a process pool.
+# Patterns of up to LOCAL_MIN_HOLES holes are solved globally instead, so
+# they match the global surface exactly (within LOCAL_TOLERANCE). Above that
+# the window is an approximation: with long-range or unbounded variograms
+# (linear, power, a spherical fitted with a long range) far holes keep real
+# weight, and on the sample designs the windowed surface deviates by up to
+# WINDOW_DEVIATION of the delay range (see `local_deviation`). The window
+# does not meet LOCAL_TOLERANCE on its own; the Analyze page says so when
+# local mode is chosen for a larger pattern.
+
+_worker: Dict[str, object] = {}
+
+
+def fit_variogram(df: pd.DataFrame, variogram_model: str, sample: int = VARIOGRAM_SAMPLE):
+    """Fit the variogram the way pykrige does, on at most `sample` holes."""
+    from pykrige.ok import OrdinaryKriging
+    if len(df) > sample:
+        df = df.sample(sample, random_state=0)
+    ok = OrdinaryKriging(df["x"], df["y"], df["delay"], variogram_model=variogram_model)
+    return ok.variogram_function, list(ok.variogram_model_parameters)
+
+
+def _init_worker(xy, values, variogram_function, params, n_neighbours):
+    from scipy.spatial import cKDTree
+    _worker.update(
+        tree=cKDTree(xy),
+        xy=xy,
+        values=values,
+        vf=variogram_function,
+        params=params,
+        k=n_neighbours,
+    )
+
+
+def _solve_tile(nodes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Krige one batch of nodes (m, 2) using the worker globals."""
+    tree, xy, values = _worker["tree"], _worker["xy"], _worker["values"]
+    vf, params, k = _worker["vf"], _worker["params"], _worker["k"]
+    m = len(nodes)
+
+    bd, idx = tree.query(nodes, k=k)
+    if k == 1:
+        bd, idx = bd[:, None], idx[:, None]
+    pts = xy[idx]                                             # (m, k, 2)
+    d = np.sqrt(((pts[:, :, None, :] - pts[:, None, :, :]) ** 2).sum(-1))
+
+    # Same sign convention as pykrige's OrdinaryKriging.
+    a = np.zeros((m, k + 1, k + 1))
+    a[:, :k, :k] = -vf(params, d)
+    idx_diag = np.arange(k)
+    a[:, idx_diag, idx_diag] = 0.0
+    a[:, k, :k] = 1.0
+    a[:, :k, k] = 1.0
+
+    b = np.empty((m, k + 1))
+    b[:, :k] = -vf(params, bd)
+    b[:, :k][bd <= 1e-10] = 0.0
+    b[:, k] = 1.0
+
+    try:
+        x = np.linalg.solve(a, b[:, :, None])[:, :, 0]
+    except np.linalg.LinAlgError:
+        # duplicated holes make some systems singular
+        x = (np.linalg.pinv(a) @ b[:, :, None])[:, :, 0]
+    z = (x[:, :k] * values[idx]).sum(axis=1)
+    ss = (x * -b).sum(axis=1)
+    return z, ss
+
+
+def krige_local(
+        df: pd.DataFrame,
+        variogram_model: str,
+        gridx: np.ndarray,
+        gridy: np.ndarray,
+        n_neighbours: int = DEFAULT_NEIGHBOURS,
+        workers: int | None = None,
+        tile_nodes: int = TILE_NODES,
+        min_holes: int = LOCAL_MIN_HOLES) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Moving-window Ordinary Kriging on the (gridx, gridy) grid.
+    workers   : process count, None = all cores, 1 = run in this process
+    min_holes : patterns up to this size are kriged globally
+    returns   : (z, variance), both shaped (len(gridy), len(gridx))
+    """
+    gx, gy = np.meshgrid(np.asarray(gridx, dtype=float), np.asarray(gridy, dtype=float))
+    nodes = np.column_stack([gx.ravel(), gy.ravel()])
+    z, ss = krige_local_points(df, variogram_model, nodes, n_neighbours, workers, tile_nodes, min_holes)
+    return z.reshape(gx.shape), ss.reshape(gx.shape)
+
+
+def krige_local_points(
+        df: pd.DataFrame,
+        variogram_model: str,
+        nodes: np.ndarray,
+        n_neighbours: int = DEFAULT_NEIGHBOURS,
+        workers: int | None = None,
+        tile_nodes: int = TILE_NODES,
+        min_holes: int = LOCAL_MIN_HOLES) -> Tuple[np.ndarray, np.ndarray]:
+    """Moving-window Ordinary Kriging at arbitrary (m, 2) nodes.
+    Patterns of at most `min_holes` holes are kriged globally."""
+    xy = df[["x", "y"]].to_numpy(dtype=float)
+    values = df["delay"].to_numpy(dtype=float)
+    if len(xy) <= min_holes:
+        from pykrige.ok import OrdinaryKriging
+        ok = OrdinaryKriging(df["x"], df["y"], df["delay"], variogram_model=variogram_model)
+        z, ss = ok.execute("points", nodes[:, 0], nodes[:, 1])
+        return np.asarray(z, dtype=float), np.asarray(ss, dtype=float)
+    k = max(1, min(n_neighbours, len(xy)))
+    vf, params = fit_variogram(df, variogram_model)
+
+    tiles = [nodes[i:i + tile_nodes] for i in range(0, len(nodes), tile_nodes)]
+    if not tiles:
+        return np.empty(0), np.empty(0)
+
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(tiles))
+    init_args = (xy, values, vf, params, k)
+    if workers <= 1:
+        _init_worker(*init_args)
+        results = [_solve_tile(t) for t in tiles]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=init_args) as pool:
+            results = list(pool.map(_solve_tile, tiles))
+
+    z = np.concatenate([r[0] for r in results])
+    ss = np.concatenate([r[1] for r in results])
+    return z, ss
+
+
+def local_deviation(
+        df: pd.DataFrame,
+        variogram_model: str,
+        gridx: np.ndarray,
+        gridy: np.ndarray,
+        n_neighbours: int = DEFAULT_NEIGHBOURS,
+        min_holes: int = LOCAL_MIN_HOLES) -> float:
+    """Max |local - global| over the grid, as a share of the delay range.
+    min_holes=0 measures the moving window itself, without the global
+    fallback for small patterns."""
+    zg, _ = krige_grid(df, variogram_model, gridx, gridy)
+    zl, _ = krige_local(df, variogram_model, gridx, gridy, n_neighbours, workers=1, min_holes=min_holes)
+    span = float(df["delay"].max() - df["delay"].min()) or 1.0
+    return float(np.nanmax(np.abs(zl - zg)) / span)
+
+
+# ---------- adaptive grid ----------
+def hole_spacing(df: pd.DataFrame) -> float:
+    """Median nearest-neighbour distance between holes (m)."""
+    from scipy.spatial import cKDTree
+    xy = df[["x", "y"]].to_numpy(dtype=float)
+    if len(xy) < 2:
+        return 0.0
+    d, _ = cKDTree(xy).query(xy, k=2)
+    d = d[:, 1][d[:, 1] > 0]
+    return float(np.median(d)) if len(d) else 0.0
+
+
+def grid_axes(
+        df: pd.DataFrame,
+        node_budget: int = NODE_BUDGET,
+        nodes_per_spacing: float = NODES_PER_SPACING) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Grid axes sized from the hole spacing and pattern extent.
+    Aims for `nodes_per_spacing` nodes per hole spacing, scaled down to
+    stay under `node_budget` nodes. Both axes are strictly ascending, also
+    for a single row or column of holes.
+    """
+    x0, x1 = float(df["x"].min()), float(df["x"].max())
+    y0, y1 = float(df["y"].min()), float(df["y"].max())
+    spacing = hole_spacing(df)
+    # a single row / column (or hole) has no extent across it: pad that
+    # axis by half a spacing each side so the grid stays two-dimensional
+    pad = (spacing or 1.0) / 2
+    if x1 - x0 <= 0:
+        x0, x1 = x0 - pad, x1 + pad
+    if y1 - y0 <= 0:
+        y0, y1 = y0 - pad, y1 + pad
+    w, h = x1 - x0, y1 - y0
+    step = spacing / nodes_per_spacing
+
+    if step > 0:
+        nx, ny = w / step + 1, h / step + 1
+    else:
+        nx = ny = float(MIN_AXIS_NODES)
+    if nx * ny > node_budget:
+        scale = np.sqrt(node_budget / (nx * ny))
+        nx, ny = nx * scale, ny * scale
+    nx = max(MIN_AXIS_NODES, int(np.ceil(nx)))
+    ny = max(MIN_AXIS_NODES, int(np.ceil(ny)))
+    return np.linspace(x0, x1, nx), np.linspace(y0, y1, ny)
+
+
+@profiled
+def krige_adaptive(
+        df: pd.DataFrame,
+        variogram_model: str,
+        node_budget: int = NODE_BUDGET,
+        refine: int = REFINE_FACTOR,
+        cache: KrigingCache | None = None,
+        n_neighbours: int | None = None,
+        workers: int | None = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Coarse-to-fine kriging.
+    A coarse grid (half the budget) is kriged first; coarse cells are then
+    ranked by delay change across them and the steepest ones are re-kriged
+    at `refine`x resolution until the budget is spent. Remaining fine nodes
+    are bilinearly interpolated from the coarse surface.
+    returns : (gridx, gridy, z, variance) on the fine grid
+    """
+    from scipy.interpolate import RegularGridInterpolator
+
+    gridx, gridy = grid_axes(df, node_budget // 2)
+    key = (design_hash(df), variogram_model, grid_key(gridx, gridy), n_neighbours, "adaptive", node_budget, refine)
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            z, ss = hit
+            return (
+                np.linspace(gridx[0], gridx[-1], (len(gridx) - 1) * refine + 1),
+                np.linspace(gridy[0], gridy[-1], (len(gridy) - 1) * refine + 1),
+                z,
+                ss,
+            )
+
+    zc, ssc = krige_grid(df, variogram_model, gridx, gridy, cache, n_neighbours, workers)
+    fx = np.linspace(gridx[0], gridx[-1], (len(gridx) - 1) * refine + 1)
+    fy = np.linspace(gridy[0], gridy[-1], (len(gridy) - 1) * refine + 1)
+    fgx, fgy = np.meshgrid(fx, fy)
+    fine_pts = np.column_stack([fgy.ravel(), fgx.ravel()])
+    z = RegularGridInterpolator((gridy, gridx), zc)(fine_pts).reshape(fgx.shape)
+    ss = RegularGridInterpolator((gridy, gridx), ssc)(fine_pts).reshape(fgx.shape)
+
+    if refine > 1:
+        # delay change across each coarse cell (max corner-to-corner)
+        corners = np.stack([zc[:-1, :-1], zc[:-1, 1:], zc[1:, :-1], zc[1:, 1:]])
+        steep = corners.max(axis=0) - corners.min(axis=0)
+        per_cell = refine * refine
+        n_cells = max(0, (node_budget - zc.size) // per_cell)
+        order = np.argsort(steep, axis=None)[::-1][:n_cells]
+        order = order[steep.ravel()[order] > 0]
+
+        mask = np.zeros(steep.shape, dtype=bool)
+        mask.flat[order] = True
+        fine_mask = np.zeros(fgx.shape, dtype=bool)
+        fine_mask[:-1, :-1] = np.kron(mask, np.ones((refine, refine), dtype=bool))
+        # include the far edges of refined cells
+        fine_mask[1:, :] |= fine_mask[:-1, :].copy()
+        fine_mask[:, 1:] |= fine_mask[:, :-1].copy()
+
+        if fine_mask.any():
+            xs, ys = fgx[fine_mask], fgy[fine_mask]
+            if n_neighbours is None:
+                from pykrige.ok import OrdinaryKriging
+                ok = OrdinaryKriging(df["x"], df["y"], df["delay"], variogram_model=variogram_model)
+                zr, ssr = ok.execute("points", xs, ys)
+            else:
+                zr, ssr = krige_local_points(df, variogram_model, np.column_stack([xs, ys]), n_neighbours, workers)
+            z[fine_mask] = np.asarray(zr, dtype=float)
+            ss[fine_mask] = np.asarray(ssr, dtype=float)
+
+    z.setflags(write=False)
+    ss.setflags(write=False)
+    if cache is not None:
+        cache.put(key, z, ss)
+    return fx, fy, z, ss
+
+
+# ---------- surfaces from project files ----------
+VARIOGRAM_MODELS = ("exponential", "spherical", "gaussian", "linear", "power")
+
+
+def _is_int(v) -> bool:
+    return isinstance(v, int) and not isinstance(v, bool)
+
+
+def trusted_surfaces(df: pd.DataFrame, surfaces) -> List[Tuple[tuple, np.ndarray, np.ndarray]]:
+    """
+    The surfaces of a loaded project that may go into the shared cache:
+    keys of the form krige_adaptive / krige_grid write, for this design
+    (`df`), with z / ss shaped like the grid the key names. The adaptive
+    grid is rebuilt from the key's node budget and must hash to the key's
+    grid; plain grid keys are accepted for those coarse grids only.
+    Returned arrays are float and read-only, like the cached ones.
+    """
+    design = design_hash(df)
+
+    def well_formed(key) -> bool:
+        return (
+            len(key) >= 4
+            and key[0] == design
+            and key[1] in VARIOGRAM_MODELS
+            and isinstance(key[2], str)
+            and (key[3] is None or (_is_int(key[3]) and key[3] > 0))
+        )
+
+    shapes: Dict[tuple, Tuple[int, int]] = {}
+    coarse: Dict[str, Tuple[int, int]] = {}
+    for key, _, _ in surfaces:
+        key = tuple(key)
+        if (
+            len(key) == 7 and well_formed(key) and key[4] == "adaptive"
+            and _is_int(key[5]) and key[5] > 0 and _is_int(key[6]) and key[6] > 0
+        ):
+            gridx, gridy = grid_axes(df, key[5] // 2)
+            if grid_key(gridx, gridy) == key[2]:
+                refine = key[6]
+                shapes[key] = ((len(gridy) - 1) * refine + 1, (len(gridx) - 1) * refine + 1)
+                coarse[key[2]] = (len(gridy), len(gridx))
+    for key, _, _ in surfaces:
+        key = tuple(key)
+        if len(key) == 4 and well_formed(key) and key[2] in coarse:
+            shapes[key] = coarse[key[2]]
+
+    out = []
+    for key, z, ss in surfaces:
+        shape = shapes.get(tuple(key))
+        if shape is None or np.shape(z) != shape or np.shape(ss) != shape:
+            continue
+        z, ss = np.array(z, dtype=float), np.array(ss, dtype=float)
+        z.setflags(write=False)
+        ss.setflags(write=False)
+        out.append((tuple(key), z, ss))
+    return out
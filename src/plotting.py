@@ -0,0 +1,154 @@
+"""
+Level-of-detail hole plots shared by the Grid Design, View/Edit and Analyze
+pages.
+  - above WEBGL_THRESHOLD markers the trace switches to Scattergl
+  - labels are drawn only while at most LABEL_LIMIT holes are in view,
+    as a separate text trace holding just those labels
+  - beyond OVERVIEW_POINTS holes the overview is thinned on a grid (one hole
+    per cell), while a chosen detail region keeps every hole
+The figure sent to the browser is therefore bounded by these constants,
+not by the size of the pattern.
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+from src.profiling import profiled
+
+WEBGL_THRESHOLD: int = 2_000
+LABEL_LIMIT: int = 300
+OVERVIEW_POINTS: int = 20_000
+CONTEXT_SHARE: float = 0.25     # share of the point budget kept outside a detail region
+
+Bounds = Tuple[float, float, float, float]     # x0, x1, y0, y1
+
+
+def in_bounds(x: np.ndarray, y: np.ndarray, bounds: Bounds | None) -> np.ndarray:
+    if bounds is None:
+        return np.ones(len(x), dtype=bool)
+    x0, x1, y0, y1 = bounds
+    return (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+
+
+def thin(x: np.ndarray, y: np.ndarray, idx: np.ndarray, max_points: int) -> np.ndarray:
+    """At most ~max_points of `idx`: the first hole of each cell of a
+    sqrt(max_points)-square grid over their extent."""
+    if len(idx) <= max_points:
+        return idx
+    side = max(int(np.sqrt(max_points)), 1)
+    px, py = x[idx], y[idx]
+    span_x = max(np.ptp(px), 1e-9)
+    span_y = max(np.ptp(py), 1e-9)
+    cx = np.minimum(((px - px.min()) / span_x * side).astype(np.int64), side - 1)
+    cy = np.minimum(((py - py.min()) / span_y * side).astype(np.int64), side - 1)
+    _, first = np.unique(cy * side + cx, return_index=True)
+    return idx[np.sort(first)]
+
+
+def lod_indices(
+        x: np.ndarray,
+        y: np.ndarray,
+        bounds: Bounds | None = None,
+        max_points: int = OVERVIEW_POINTS) -> np.ndarray:
+    """Positions of the holes to draw: all of them when few, otherwise a
+    thinned overview plus (up to the budget) every hole in `bounds`."""
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+    if bounds is None:
+        return thin(x, y, np.arange(n), max_points)
+    inside = in_bounds(x, y, bounds)
+    context = int(max_points * CONTEXT_SHARE)
+    detail = thin(x, y, np.flatnonzero(inside), max_points - context)
+    overview = thin(x, y, np.flatnonzero(~inside), context)
+    return np.sort(np.concatenate([detail, overview]))
+
+
+@profiled
+def hole_traces(
+        x,
+        y,
+        labels=None,
+        ids=None,
+        bounds: Bounds | None = None,
+        name: str | None = None,
+        marker: dict | None = None,
+        textposition: str = "top center",
+        max_points: int = OVERVIEW_POINTS,
+        label_limit: int = LABEL_LIMIT,
+        webgl_threshold: int = WEBGL_THRESHOLD) -> Tuple[List[go.BaseTraceType], Dict[str, int]]:
+    """
+    Marker trace (plus a text trace when labels fit) for a set of holes.
+    labels : per-hole text, dropped when more than `label_limit` holes are in view
+    ids    : per-hole ids shown on hover
+    bounds : detail region (x0, x1, y0, y1) — full detail and labels there
+    returns: (traces, {"total", "shown", "labelled", "labels_hidden"})
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    idx = lod_indices(x, y, bounds, max_points)
+    scatter = go.Scattergl if len(idx) > webgl_threshold else go.Scatter
+
+    hover = {}
+    if ids is not None:
+        hover = dict(customdata=np.asarray(ids)[idx], hovertemplate="#%{customdata}<br>x=%{x:.2f} y=%{y:.2f}<extra></extra>")
+    traces = [scatter(x=x[idx], y=y[idx], mode="markers", marker=marker or {}, name=name, **hover)]
+
+    labelled = 0
+    if labels is not None:
+        in_view = idx[in_bounds(x[idx], y[idx], bounds)]
+        if len(in_view) <= label_limit:
+            text = np.asarray(labels)[in_view]
+            labelled = len(in_view)
+            traces.append(
+                scatter(
+                    x=x[in_view],
+                    y=y[in_view],
+                    mode="text",
+                    text=text,
+                    textposition=textposition,
+                    hoverinfo="skip",
+                    showlegend=False,
+                )
+            )
+    info = {"total": len(x), "shown": len(idx), "labelled": labelled}
+    info["labels_hidden"] = labels is not None and labelled == 0
+    return traces, info
+
+
+def apply_bounds(fig: go.Figure, bounds: Bounds | None):
+    """Zoom the figure onto the detail region."""
+    if bounds is not None:
+        fig.update_xaxes(range=[bounds[0], bounds[1]])
+        fig.update_yaxes(range=[bounds[2], bounds[3]])
+
+
+def detail_region(x, y, text: dict, key: str, label_limit: int = LABEL_LIMIT) -> Bounds | None:
+    """
+    Expander with x / y range sliders selecting the detail region.
+    Only offered when the pattern has more holes than can be labelled.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) <= label_limit:
+        return None
+    x_lo, x_hi = float(np.floor(x.min())), float(np.ceil(x.max()))
+    y_lo, y_hi = float(np.floor(y.min())), float(np.ceil(y.max()))
+    if x_hi <= x_lo or y_hi <= y_lo:
+        return None
+    with st.expander(text["detail_region"]):
+        st.caption(text["detail_hint"])
+        if not st.toggle(text["detail_enable"], key=f"{key}_on"):
+            return None
+        xr = st.slider("x", x_lo, x_hi, (x_lo, x_hi), key=f"{key}_x")
+        yr = st.slider("y", y_lo, y_hi, (y_lo, y_hi), key=f"{key}_y")
+    return xr[0], xr[1], yr[0], yr[1]
+
+
+def lod_caption(info: Dict[str, int], text: dict):
+    """Note under a plot when holes or labels were dropped."""
+    if info["shown"] < info["total"] or info["labels_hidden"]:
+        st.caption(text["lod_caption"].format(**info))
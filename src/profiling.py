@@ -0,0 +1,149 @@
+"""
+Opt-in per-rerun profiling.
+Page scripts wrap their stages in `stage("name")` and library functions are
+decorated with `@profiled`. Both cost a single attribute check unless the
+current rerun was started with `begin_rerun` (the debug toggle in main.py,
+or BLAST_PROFILE=1). While a rerun is profiled, every stage records its
+wall time, net allocation and peak allocation (tracemalloc); `end_rerun`
+returns the records and logs them as one JSON line on the
+"blast.profile" logger.
+
+tracemalloc is process-wide: with several sessions profiling at once the
+allocation figures of overlapping stages include each other's work.
+"""
+
+from contextlib import contextmanager, nullcontext
+from typing import Dict
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+ENV_FLAG = "BLAST_PROFILE"
+SLOW_RERUN_MS: float = 1000.0    # reruns slower than this are logged at WARNING
+
+logger = logging.getLogger("blast.profile")
+
+_local = threading.local()       # one Streamlit session runs its script on one thread
+_active = 0
+_active_lock = threading.Lock()
+
+
+def enabled_by_env() -> bool:
+    return os.environ.get(ENV_FLAG, "").lower() in ("1", "true", "yes")
+
+
+def is_profiling() -> bool:
+    return getattr(_local, "records", None) is not None
+
+
+# ---------- rerun ----------
+def begin_rerun(page: str = "") -> None:
+    """Start collecting stages for the rerun running on this thread."""
+    global _active
+    with _active_lock:
+        _active += 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+    _local.records = []
+    _local.stack = []
+    _local.page = page
+    _local.started = time.perf_counter()
+
+
+def end_rerun() -> Dict[str, object] | None:
+    """Stop collecting; log and return {page, total_ms, stages}."""
+    global _active
+    records = getattr(_local, "records", None)
+    if records is None:
+        return None
+    report = {
+        "page": _local.page,
+        "total_ms": round((time.perf_counter() - _local.started) * 1000, 2),
+        "stages": records,
+    }
+    _local.records = None
+    with _active_lock:
+        _active -= 1
+        if _active == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+    level = logging.WARNING if report["total_ms"] > SLOW_RERUN_MS else logging.INFO
+    logger.log(level, json.dumps(report))
+    return report
+
+
+# ---------- stages ----------
+@contextmanager
+def _measure(name: str):
+    stack = _local.stack
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:   # keep the parent's peak so far before resetting it
+            stack[-1]["child_peak"] = max(stack[-1]["child_peak"], peak)
+        tracemalloc.reset_peak()
+    else:
+        current = 0
+    # appended on entry so that stages are listed in call order
+    record = {"stage": name, "depth": len(stack), "ms": 0.0, "alloc_kb": 0.0, "peak_kb": 0.0}
+    _local.records.append(record)
+    frame = {"child_peak": 0}
+    stack.append(frame)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - t0) * 1000
+        stack.pop()
+        alloc = peak = 0
+        if tracing and tracemalloc.is_tracing():
+            now, traced_peak = tracemalloc.get_traced_memory()
+            top = max(traced_peak, frame["child_peak"])
+            alloc, peak = now - current, top - current
+            if stack:
+                stack[-1]["child_peak"] = max(stack[-1]["child_peak"], top)
+        record.update(ms=round(ms, 2), alloc_kb=round(alloc / 1024, 1), peak_kb=round(peak / 1024, 1))
+
+
+def stage(name: str):
+    """Context manager timing one stage of a page (no-op unless profiling)."""
+    return _measure(name) if is_profiling() else nullcontext()
+
+
+def profiled(func=None, *, name: str | None = None):
+    """Decorator recording each call of a library function as a stage."""
+    def wrap(f):
+        label = name or f"{f.__module__.rsplit('.', 1)[-1]}.{f.__name__}"
+
+        @functools.wraps(f)
+        def inner(*args, **kwargs):
+            if getattr(_local, "records", None) is None:
+                return f(*args, **kwargs)
+            with _measure(label):
+                return f(*args, **kwargs)
+        return inner
+    return wrap(func) if func is not None else wrap
+
+
+# ---------- UI ----------
+def debug_panel(report: Dict[str, object] | None, text: dict) -> None:
+    """Sidebar table of the last profiled rerun."""
+    import pandas as pd
+    import streamlit as st
+
+    if not report:
+        return
+    with st.sidebar.expander(text["profile_panel"].format(ms=report["total_ms"]), expanded=False):
+        stages = pd.DataFrame(report["stages"])
+        if stages.empty:
+            st.caption(text["profile_empty"])
+            return
+        stages["stage"] = ["· " * d + s for d, s in zip(stages["depth"], stages["stage"])]
+        st.dataframe(
+            stages[["stage", "ms", "alloc_kb", "peak_kb"]],
+            hide_index=True,
+            use_container_width=True,
+        )
@@ -0,0 +1,145 @@
+"""
+Uniform-grid spatial hash of hole positions.
+Kept in session state and updated on every add / move / delete so that
+separation checks and nearest-neighbour queries cost O(1) on average
+instead of a scan over the whole table.
+"""
+
+from typing import Dict, Hashable, Iterable, Tuple
+import math
+
+import numpy as np
+
+CELL_SIZE_M: float = 1.0
+
+Cell = Tuple[int, int]
+
+
+class SpatialHash:
+    """Maps grid cells to the holes inside them, keyed by hole id."""
+
+    def __init__(self, cell_size: float = CELL_SIZE_M):
+        self.cell_size = cell_size
+        self.cells: Dict[Cell, Dict[Hashable, Tuple[float, float]]] = {}
+        self.where: Dict[Hashable, Cell] = {}
+        self._extent: Tuple[int, int, int, int] | None = None
+
+    @classmethod
+    def from_xy(cls, keys: Iterable[Hashable], x, y, cell_size: float = CELL_SIZE_M) -> "SpatialHash":
+        sh = cls(cell_size)
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        ix = np.floor(x / cell_size).astype(np.int64).tolist()
+        iy = np.floor(y / cell_size).astype(np.int64).tolist()
+        for key, cx, cy, px, py in zip(keys, ix, iy, x.tolist(), y.tolist()):
+            sh.cells.setdefault((cx, cy), {})[key] = (px, py)
+            sh.where[key] = (cx, cy)
+        return sh
+
+    def __len__(self) -> int:
+        return len(self.where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.where
+
+    def _cell(self, x: float, y: float) -> Cell:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    # ---------- edits ----------
+    def add(self, key: Hashable, x: float, y: float) -> None:
+        if key in self.where:
+            self.remove(key)
+        c = self._cell(x, y)
+        self.cells.setdefault(c, {})[key] = (float(x), float(y))
+        self.where[key] = c
+        if self._extent is not None:
+            x0, x1, y0, y1 = self._extent
+            self._extent = (min(x0, c[0]), max(x1, c[0]), min(y0, c[1]), max(y1, c[1]))
+
+    def remove(self, key: Hashable) -> None:
+        c = self.where.pop(key)
+        bucket = self.cells[c]
+        del bucket[key]
+        if not bucket:
+            del self.cells[c]
+            if self._extent is not None and (c[0] in self._extent[:2] or c[1] in self._extent[2:]):
+                self._extent = None
+
+    def move(self, key: Hashable, x: float, y: float) -> None:
+        self.add(key, x, y)
+
+    def position(self, key: Hashable) -> Tuple[float, float]:
+        return self.cells[self.where[key]][key]
+
+    # ---------- queries ----------
+    def within(self, x: float, y: float, radius: float, exclude: Hashable = None) -> Dict[Hashable, float]:
+        """Ids and distances of holes closer than `radius` to (x, y)."""
+        cx, cy = self._cell(x, y)
+        reach = int(math.ceil(radius / self.cell_size))
+        out = {}
+        for i in range(cx - reach, cx + reach + 1):
+            for j in range(cy - reach, cy + reach + 1):
+                for key, (px, py) in self.cells.get((i, j), {}).items():
+                    d = math.hypot(px - x, py - y)
+                    if d < radius and key != exclude:
+                        out[key] = d
+        return out
+
+    def nearest(self, x: float, y: float, exclude: Hashable = None) -> Tuple[Hashable, float]:
+        """(id, distance) of the nearest hole, searching rings of cells outwards."""
+        if len(self.where) - (exclude in self.where) <= 0:
+            return None, math.inf
+        cx, cy = self._cell(x, y)
+        x0, x1, y0, y1 = self._bounds()
+        first = max(x0 - cx, cx - x1, y0 - cy, cy - y1, 0)    # rings before this are empty
+        last = max(abs(x0 - cx), abs(x1 - cx), abs(y0 - cy), abs(y1 - cy))
+        best_key, best = None, math.inf
+        for ring in range(first, last + 1):
+            if (2 * ring + 1) ** 2 > 4 * len(self.cells):
+                # sparse hash: probing further rings costs more than a scan
+                return self._nearest_scan(x, y, cx, cy, ring, exclude, best_key, best)
+            for c in self._ring(cx, cy, ring):
+                for key, (px, py) in self.cells.get(c, {}).items():
+                    if key == exclude:
+                        continue
+                    d = math.hypot(px - x, py - y)
+                    if d < best:
+                        best_key, best = key, d
+            # anything in ring + 1 is at least ring * cell_size away
+            if best <= ring * self.cell_size:
+                break
+        return best_key, best
+
+    def _nearest_scan(self, x, y, cx, cy, ring, exclude, best_key, best):
+        """nearest() over the occupied cells at or beyond `ring`."""
+        for (i, j), bucket in self.cells.items():
+            if max(abs(i - cx), abs(j - cy)) < ring:
+                continue
+            for key, (px, py) in bucket.items():
+                if key == exclude:
+                    continue
+                d = math.hypot(px - x, py - y)
+                if d < best:
+                    best_key, best = key, d
+        return best_key, best
+
+    @staticmethod
+    def _ring(cx: int, cy: int, ring: int) -> Iterable[Cell]:
+        """The 8 * ring cells at Chebyshev distance `ring` from (cx, cy)."""
+        if ring == 0:
+            yield cx, cy
+            return
+        for i in range(cx - ring, cx + ring + 1):
+            yield i, cy - ring
+            yield i, cy + ring
+        for j in range(cy - ring + 1, cy + ring):
+            yield cx - ring, j
+            yield cx + ring, j
+
+    def _bounds(self) -> Tuple[int, int, int, int]:
+        """Occupied cell-index range, cached until an edge cell empties."""
+        if self._extent is None:
+            ix = [c[0] for c in self.cells]
+            iy = [c[1] for c in self.cells]
+            self._extent = (min(ix), max(ix), min(iy), max(iy))
+        return self._extent
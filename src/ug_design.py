@@ -1,61 +1,92 @@
+import io
+
 import streamlit as st
-import matplotlib.pyplot as plt
+from matplotlib.collections import EllipseCollection
+from matplotlib.figure import Figure
 import pandas as pd
+import numpy as np
+from src.holeset import HoleSet
+from src.pattern import LAYOUTS, parse_polygon
+from src.profiling import stage
+from src.face_layout import PROFILES, HOLE_CLASSES, CUT_PATTERN, drift_profile, face_layout, stack_layout
 
 
-def cords_generator(x_start, y_start, spacing, burden):
-    x = x_start
-    y = y_start
-    while True:
-        yield x, y
-        x += spacing
-        if x > width:
-            x = x_start
-            y += burden
-        if y > height:
-            break
+FIGURE_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+FIGURE_DPI = 150
 
 
-def draw_graph(stope_cords: list):
-    fig, ax = plt.subplots()
+def _hole_collection(ax, cords: np.ndarray, radius: float, color: str):
+    """All holes of one class as a single EllipseCollection (sizes in data units)."""
+    size = np.full(len(cords), 2 * radius)
+    holes = EllipseCollection(
+        size, size, np.zeros(len(cords)),
+        units="xy", offsets=cords, offset_transform=ax.transData,
+        facecolors=color, edgecolors="none",
+    )
+    ax.add_collection(holes)
 
-    for cord in stope_cords:
-        circle = plt.Circle(cord, hole_diameter, color=stope_color, fill=True)
-        ax.add_patch(circle)
 
+def _hide_axes(ax):
     # Masquer les axes
     ax.set_xticks([])  # Masquer les ticks de l'axe X
     ax.set_yticks([])  # Masquer les ticks de l'axe Y
+    ax.set_aspect('equal', adjustable='box')
 
-    ax.set_xlim(0 , stope_cords[-1][0] + side_stand_off)
-    ax.set_ylim(0, stope_cords[-1][1] + top_stand_off)
 
-    plt.gca().set_aspect('equal', adjustable='box')
+def _to_bytes(fig: Figure, fmt: str) -> bytes:
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, dpi=FIGURE_DPI, bbox_inches="tight")
+    return buf.getvalue()
 
-    return fig, ax
 
+def draw_graph(layout: dict, outline: np.ndarray, radius: float, colors: dict) -> Figure:
+    # Figure (not pyplot): no global figure registry to fill up on reruns
+    fig = Figure()
+    ax = fig.subplots()
 
-def draw_cut(cut_cords: list):
-    cut_fig, cut_ax = plt.subplots()
-    for cut_cord in cut_cords:
-        circle = plt.Circle(cut_cord, hole_diameter, color=cut_color, fill=True)
-        cut_ax.add_patch(circle)
+    ring = np.vstack([outline, outline[:1]])
+    ax.plot(ring[:, 0], ring[:, 1], color="grey", linewidth=1)
+    for name in HOLE_CLASSES:
+        if len(layout[name]):
+            _hole_collection(ax, layout[name], radius, colors[name])
 
-        plt.gca().set_aspect('equal', adjustable='box')
+    _hide_axes(ax)
+    (x0, y0), (x1, y1) = outline.min(axis=0), outline.max(axis=0)
+    pad = 0.05 * max(x1 - x0, y1 - y0)
+    ax.set_xlim(x0 - pad, x1 + pad)
+    ax.set_ylim(y0 - pad, y1 + pad)
+
+    return fig
 
-    # Masquer les axes
-    cut_ax.set_xticks([])  # Masquer les ticks de l'axe X
-    cut_ax.set_yticks([])  # Masquer les ticks de l'axe Y
 
+def draw_cut(cut_cords: np.ndarray, radius: float, color: str) -> Figure:
+    cut_fig = Figure()
+    cut_ax = cut_fig.subplots()
+    _hole_collection(cut_ax, cut_cords, radius, color)
+
+    _hide_axes(cut_ax)
     cut_ax.set_xlim(-2 , 2)
     cut_ax.set_ylim(-2, 2)
 
     return cut_fig
 
-def add_cut(cut_cord, ax):
-    for cut_cord in cut_cords:
-        circle = plt.Circle((cut_cord[0] + x_move, cut_cord[1] + y_move), hole_diameter, color=cut_color, fill=True)
-        ax.add_patch(circle)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def render_face(layout: dict, outline: np.ndarray, radius: float, colors: dict, fmt: str = "png") -> bytes:
+    """Face figure as PNG / SVG bytes, cached by the layout and its styling."""
+    return _to_bytes(draw_graph(layout, outline, radius, colors), fmt)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def render_cut(radius: float, color: str, fmt: str = "png") -> bytes:
+    return _to_bytes(draw_cut(CUT_PATTERN, radius, color), fmt)
+
+
+def show_figure(data: bytes, fmt: str):
+    if fmt == "svg":
+        st.image(data.decode("utf-8"), use_container_width=True)
+    else:
+        st.image(data, use_container_width=True)
 
 
 # Sidebar
@@ -64,11 +95,16 @@ with st.sidebar:
     diameter = st.number_input("Hole Diameter", 32, 300, st.session_state.hole_diameter)
     spacing = st.number_input("Spacing", 0.5, 10.0, 1.1)
     burden = st.number_input("Burden", 0.5, 10.0, 1.0)
+    layout = st.selectbox("Production layout", LAYOUTS, format_func=str.capitalize)
+
+    with st.expander("Contour & Lifters"):
+        contour_spacing = st.number_input("Contour Spacing", 0.2, 5.0, 0.8)
+        contour_burden = st.number_input("Contour Burden", 0.2, 5.0, 0.7)
+        lifter_spacing = st.number_input("Lifter Spacing", 0.2, 5.0, 1.0)
+        lifter_burden = st.number_input("Lifter Burden", 0.2, 5.0, 0.7)
+
     # Cut holes
     is_cut = st.checkbox("Cut Holes")
-    a = 0.250
-    b = 0.300
-    cut_cords = [(0, 0), (0, a), (a, 0), (0, -a), (-a, 0), (a, a), (-a, -a), (a, -a), (-a, a), (0, a + b), (0, -a - b), (a + b, 0), (-a - b, 0)]
 
     with st.expander("Tweak cut position"):
         if is_cut:
@@ -78,15 +114,24 @@ with st.sidebar:
     st.divider()
 
     with st.expander("Stope Dimensions"):
-        width = st.slider("Gallery Width", 0, 10, 7)
-        height = st.slider("Gallery Height", 0, 10, 6)
-    
+        profile = st.selectbox("Profile", PROFILES, index=1, format_func=str.capitalize)
+        width = st.slider("Gallery Width", 1, 10, 7)
+        height = st.slider("Gallery Height", 1, 10, 6)
+        arch_rise = None
+        polygon_text = ""
+        if profile == "arched":
+            arch_rise = st.slider("Arch Rise", 0.0, width / 2, width / 4)
+        elif profile == "polygon":
+            polygon_text = st.text_area("Profile vertices (one x, y per line)", "0, 0\n7, 0\n7, 4.5\n5, 6\n2, 6\n0, 4.5")
+
     st.divider()
     col1, col2 = st.columns(2)
     with col1:
         stope_color = st.color_picker("Stope Color", "#FF0000")
+        contour_color = st.color_picker("Contour Color", "#1F77B4")
     with col2:
         cut_color = st.color_picker("Cut color", "#00FF00")
+        lifter_color = st.color_picker("Lifter Color", "#FF7F0E")
 
     st.divider()
     with st.expander("Stand-Offs"):
@@ -99,51 +144,75 @@ with st.sidebar:
 st.session_state.hole_diameter = diameter
 
 hole_diameter = diameter / 1000
-spacing = spacing
-burden = burden
-x_start = side_stand_off
-y_start = bottom_stand_off
-
-cords = list(cords_generator(x_start, y_start, spacing, burden))
-
-
-df = pd.DataFrame(cords, columns=["x", "y"])
-df["delay"] = 0.0
-if "df" not in st.session_state:
-    st.session_state.df = df
-
-if is_cut:
-    df = pd.concat([df, pd.DataFrame(cut_cords, columns=["x", "y"])], ignore_index=True)
-    df["delay"].fillna(0.0, inplace=True)
-
-# update session state with the DataFrame
-st.session_state.df = df
+colors = {"production": stope_color, "contour": contour_color, "lifter": lifter_color, "cut": cut_color}
+
+polygon = None
+if profile == "polygon":
+    try:
+        polygon = parse_polygon(polygon_text)
+    except ValueError:
+        polygon = None
+    if polygon is None:
+        st.warning("Profile vertices could not be read; using a rectangular profile.")
+        profile = "rectangular"
+
+outline = drift_profile(width, height, profile, arch_rise, polygon)
+face = face_layout(
+    outline,
+    spacing,
+    burden,
+    contour_spacing,
+    contour_burden,
+    lifter_spacing,
+    lifter_burden,
+    bottom_stand_off,
+    side_stand_off,
+    top_stand_off,
+    cut_offset=(x_move, y_move) if is_cut else None,
+    layout=layout,
+)
+
+xy, _ = stack_layout(face)
+holes = HoleSet(xy[:, 0], xy[:, 1], np.zeros(len(xy)))
+
+# update session state with the holes
+st.session_state.holes = holes
+df = holes.to_frame()
 
 
 design, data, cut = st.tabs(["Stope Design", "Stope Data", "Cut design"])
 
 with design:
-    fig, ax = draw_graph(cords)
-    if is_cut:
-        add_cut(cut_cords, ax)
-    st.pyplot(fig)
+    fig_format = st.radio("Figure format", list(FIGURE_FORMATS), horizontal=True, format_func=str.upper)
+    with stage("render figure"):
+        figure = render_face(face, outline, hole_diameter, colors, fig_format)
+        show_figure(figure, fig_format)
+    st.download_button(
+        "Download figure",
+        figure,
+        file_name=f"stope_design.{fig_format}",
+        mime=FIGURE_FORMATS[fig_format],
+    )
 with data:
     # Number of holes
     total_number_holes = df["x"].count()
     st.write(f"Number of Hole: {total_number_holes}")
+    counts = st.columns(len(HOLE_CLASSES))
+    for col, name in zip(counts, HOLE_CLASSES):
+        col.metric(name.capitalize(), len(face[name]))
     st.divider()
     edit_df = st.checkbox("Edit DataFrame")
     if edit_df:
         st.write("DataFrame with hole coordinates and delay:")
-        st.session_state.df = st.data_editor(st.session_state.df, use_container_width=True, num_rows="dynamic", key="df_editor")
+        edited = st.data_editor(df, use_container_width=True, num_rows="dynamic", key="df_editor")
+        st.session_state.holes = HoleSet.from_frame(edited)
     else:
-        st.dataframe(st.session_state.df, use_container_width=True)
+        st.dataframe(df, use_container_width=True)
 
 with cut:
     if is_cut:
         st.text("Here is the cut")
-        cut_fig = draw_cut(cut_cords)
-        st.pyplot(cut_fig)
+        show_figure(render_cut(hole_diameter, cut_color, "png"), "png")
     else:
         st.text("Building in progress")
         st.info("Please check the Cut Holes checkbox in the sidebar to see the cut design")
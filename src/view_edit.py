@@ -1,9 +1,21 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 import time
-from collections import deque
+from src.holeset import HoleSet
+from src.history import EditHistory, Delta, apply_delta, add_rows, delete_rows, set_rows, batch_rows, MAX_HISTORY
+from src.spatial_hash import SpatialHash
+from src.design_io import save_project, design_params, available_formats, PROJECT_FORMATS
+from src.kriging import shared_cache, design_hash
+from src.plotting import hole_traces, detail_region, apply_bounds, lod_caption
+from src.profiling import stage
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def cached_project(design_key: str, ids, params: dict, surface_keys: tuple, fmt: str, _holes: HoleSet, _surfaces) -> bytes:
+    """Project file keyed by design content, hole ids, parameters, the cached
+    surfaces and the container format."""
+    return save_project(_holes, params, _surfaces, fmt)
 
 
 TEXT = st.session_state.text  # injected in main.py
@@ -11,36 +23,69 @@ TEXT = st.session_state.text  # injected in main.py
 # ------------------------------------------------------------------
 # 1. Undo / Redo helpers
 # ------------------------------------------------------------------
-MAX_HISTORY = 30
-
-
-def push_state(df: pd.DataFrame):
-    """Save current dataframe to history."""
-    if st.session_state.df is not None:
-        st.session_state.history.append(df.copy())
+def commit(delta: Delta):
+    """Apply an edit to the session holes and record it in the history."""
+    st.session_state.holes = st.session_state.history.apply(st.session_state.holes, delta)
+    sync_hash(delta)
 
 
 def undo():
-    if len(st.session_state.history) > 1:
-        st.session_state.redo_stack.append(st.session_state.history.pop())
-        st.session_state.df = st.session_state.history[-1].copy()
+    if st.session_state.history.can_undo:
+        delta = st.session_state.history.undo_stack[-1]
+        st.session_state.holes = st.session_state.history.undo(st.session_state.holes)
+        sync_hash(delta, reverse=True)
         st.toast("Undo last action")
-        st.rerun()
 
 
 def redo():
-    if st.session_state.redo_stack:
-        st.session_state.df = st.session_state.redo_stack.pop()
-        st.session_state.history.append(st.session_state.df.copy())
+    if st.session_state.history.can_redo:
+        delta = st.session_state.history.redo_stack[-1]
+        st.session_state.holes = st.session_state.history.redo(st.session_state.holes)
+        sync_hash(delta)
         st.toast("Redo last action")
-        st.rerun()
 
 
-# Initialise once
-if "history" not in st.session_state:
-    st.session_state.history = deque(maxlen=MAX_HISTORY)
-    st.session_state.redo_stack = deque(maxlen=MAX_HISTORY)
-    push_state(st.session_state.df)   # seed
+# ------------------------------------------------------------------
+# Spatial hash of hole ids, updated per edit
+# ------------------------------------------------------------------
+def rebuild_hash():
+    holes = st.session_state.holes
+    if holes is None:
+        st.session_state.hole_hash = SpatialHash()
+    else:
+        st.session_state.hole_hash = SpatialHash.from_xy(holes.ids.tolist(), holes.x, holes.y)
+
+
+def sync_hash(delta: Delta, reverse: bool = False):
+    """Mirror an applied (or undone) delta in the spatial hash."""
+    sh = st.session_state.hole_hash
+    kind = delta.kind
+    if kind == "batch":
+        for part in (reversed(delta.parts) if reverse else delta.parts):
+            sync_hash(part, reverse)
+    elif kind == "replace":
+        rebuild_hash()
+    elif kind == "set":
+        rows = delta.before if reverse else delta.after
+        if {"x", "y"} & set(rows):
+            for i, k in enumerate(delta.ids.tolist()):
+                x, y = sh.position(k)
+                sh.move(k, rows["x"][i] if "x" in rows else x, rows["y"][i] if "y" in rows else y)
+    elif (kind == "add") != reverse:
+        rows = delta.after if kind == "add" else delta.before
+        for k, x, y in zip(rows.ids.tolist(), rows.x.tolist(), rows.y.tolist()):
+            sh.add(k, x, y)
+    else:
+        rows = delta.after if kind == "add" else delta.before
+        for k in rows.ids.tolist():
+            sh.remove(k)
+
+
+# Initialise once; reset when another page replaced the holes
+if "history" not in st.session_state or not isinstance(st.session_state.history, EditHistory):
+    st.session_state.history = EditHistory(MAX_HISTORY)
+if st.session_state.history.track(st.session_state.holes) or "hole_hash" not in st.session_state:
+    rebuild_hash()
 
 
 # ------------------------------------------------------------------
@@ -49,16 +94,36 @@ if "history" not in st.session_state:
 MIN_SEPARATION_M = 0.5
 UNIQUE_DELAY = False
 
-def validate_new(x: float, y: float, delay: float, df: pd.DataFrame) -> str | None:
+def validate_new(x: float, y: float, delay: float, holes: HoleSet, sh: SpatialHash | None = None) -> str | None:
     """Return error string if invalid, else None."""
-    dist = ((df["x"] - x) ** 2 + (df["y"] - y) ** 2) ** 0.5
-    if dist.min() < MIN_SEPARATION_M:
+    if sh is not None:
+        too_close = bool(sh.within(x, y, MIN_SEPARATION_M))
+    else:
+        dist = ((holes.x - x) ** 2 + (holes.y - y) ** 2) ** 0.5
+        too_close = dist.min() < MIN_SEPARATION_M
+    if too_close:
         return f"Too close to existing hole (min {MIN_SEPARATION_M} m)."
-    if UNIQUE_DELAY and delay in df["delay"].values:
+    if UNIQUE_DELAY and delay in holes.delay:
         return "Delay must be unique."
     return None
 
 
+def validate_adds(adds: pd.DataFrame, holes: HoleSet) -> str | None:
+    """Check the new holes of a survey against `holes` (the table after the
+    survey's updates and deletes) and against each other."""
+    line = adds.index + 2                   # CSV line: header is line 1
+    missing = adds[["x", "y", "delay"]].isna().any(axis=1).to_numpy()
+    if missing.any():
+        return TEXT["batch_missing_values"].format(rows=", ".join(map(str, line[missing])))
+    sh = SpatialHash.from_xy(holes.ids.tolist(), holes.x, holes.y)
+    for i, (x, y, delay) in enumerate(adds[["x", "y", "delay"]].itertuples(index=False)):
+        err = validate_new(x, y, delay, holes, sh)
+        if err:
+            return TEXT["batch_row_error"].format(row=line[i], err=err)
+        sh.add(("new", i), x, y)            # later rows must clear this one too
+    return None
+
+
 # ------------------------------------------------------------------
 # Dialog: delete a point
 # ------------------------------------------------------------------
@@ -66,9 +131,8 @@ def validate_new(x: float, y: float, delay: float, df: pd.DataFrame) -> str | No
 def delete_point(point_id: int):
     st.write(TEXT["dlg_delete_msg"].format(id=point_id))
     if st.button(TEXT["dlg_delete_confirm"], type="primary"):
-        push_state(st.session_state.df)
-        st.session_state.df = st.session_state.df.drop(point_id)
-        st.session_state.df.reset_index(drop=True, inplace=True)
+        holes = st.session_state.holes
+        commit(delete_rows(holes, [holes.position(point_id)]))
         st.toast(TEXT["toast_deleted"].format(id=point_id))
         time.sleep(0.6)
         st.rerun()
@@ -80,17 +144,20 @@ def delete_point(point_id: int):
 with st.sidebar:
     st.subheader("History")
     col_undo, col_redo = st.columns(2)
-    col_undo.button("↶ Undo", on_click=undo, disabled=len(st.session_state.history) <= 1)
-    col_redo.button("↷ Redo", on_click=redo, disabled=len(st.session_state.redo_stack) == 0)
+    col_undo.button("↶ Undo", on_click=undo, disabled=not st.session_state.history.can_undo)
+    col_redo.button("↷ Redo", on_click=redo, disabled=not st.session_state.history.can_redo)
 
 # ------------------------------------------------------------------
 # Guard clause
 # ------------------------------------------------------------------
-if st.session_state.df is None or st.session_state.df.empty:
+if st.session_state.holes is None or st.session_state.holes.empty:
     st.warning(TEXT["no_points"])
     st.info(TEXT["use_generator"])
     st.stop()
 
+holes = st.session_state.holes
+df = holes.to_frame(ids_as_index=True)   # zero-copy view, indexed by hole id
+
 # ------------------------------------------------------------------
 # Sidebar controls
 # ------------------------------------------------------------------
@@ -106,79 +173,118 @@ edit_mode = st.sidebar.checkbox(TEXT["edit_design"], value=False)
 # Editing section
 # ------------------------------------------------------------------
 if edit_mode:
-    max_id = len(st.session_state.df) - 1
     point_id = st.sidebar.number_input(
         TEXT["point_id"],
-        min_value=0,
-        max_value=max_id,
-        value=0,
+        min_value=int(holes.ids.min()),
+        max_value=int(holes.ids.max()),
+        value=int(holes.ids[0]),
     )
-    point = st.session_state.df.loc[point_id]
-
-    # Delete button
-    if st.sidebar.button(TEXT["delete_point"], use_container_width=True):
-        delete_point(point_id)
-
-    # Add/Edit expander
-    with st.expander(TEXT["add_edit_exp"], expanded=False):
-        adding = st.checkbox(TEXT["add_new_point"], value=False)
-        subtitle = st.empty()
-
-        c1, c2, c3 = st.columns(3)
-        with c1:
-            new_x = st.slider(
-                TEXT["new_x"],
-                value=float(point["x"]),
-                min_value=-50.0,
-                max_value=50.0,
-            )
-        with c2:
-            new_y = st.slider(
-                TEXT["new_y"],
-                value=float(point["y"]),
-                min_value=-50.0,
-                max_value=50.0,
-            )
-        with c3:
-            new_delay = st.number_input(
-                TEXT["new_delay"],
-                value=float(point["delay"]),
-                step=1.0,
-            )
-
-        if adding:
-            subtitle.markdown(f"### {TEXT['subtitle_add']}")
-            preview_point = pd.DataFrame(
-                {"x": [new_x], "y": [new_y], "delay": [new_delay]}
-            )
-        else:
-            subtitle.markdown(f"### {TEXT['subtitle_edit'].format(id=point_id)}")
-            preview_point = None  # no preview when editing existing
-
-        submitted = st.button(TEXT["save_changes"], type="primary")
-
-        if submitted:
-            err = None
+    adding = False
+    if point_id not in holes:
+        # deleted id: only the single-hole controls need a hole
+        st.sidebar.warning(TEXT["unknown_id"].format(id=point_id))
+    else:
+        point_pos = holes.position(point_id)
+        point = df.loc[point_id]
+
+        # Delete button
+        if st.sidebar.button(TEXT["delete_point"], use_container_width=True):
+            delete_point(point_id)
+
+        # Add/Edit expander
+        with st.expander(TEXT["add_edit_exp"], expanded=False):
+            adding = st.checkbox(TEXT["add_new_point"], value=False)
+            subtitle = st.empty()
+
+            c1, c2, c3 = st.columns(3)
+            with c1:
+                new_x = st.slider(
+                    TEXT["new_x"],
+                    value=float(point["x"]),
+                    min_value=-50.0,
+                    max_value=50.0,
+                )
+            with c2:
+                new_y = st.slider(
+                    TEXT["new_y"],
+                    value=float(point["y"]),
+                    min_value=-50.0,
+                    max_value=50.0,
+                )
+            with c3:
+                new_delay = st.number_input(
+                    TEXT["new_delay"],
+                    value=float(point["delay"]),
+                    step=1.0,
+                )
+
             if adding:
-                err = validate_new(new_x, new_y, new_delay, st.session_state.df)
+                subtitle.markdown(f"### {TEXT['subtitle_add']}")
+                preview_point = pd.DataFrame(
+                    {"x": [new_x], "y": [new_y], "delay": [new_delay]}
+                )
+            else:
+                subtitle.markdown(f"### {TEXT['subtitle_edit'].format(id=point_id)}")
+                preview_point = None  # no preview when editing existing
+
+            # Nearest hole to the new position (O(1) average via the spatial hash)
+            own_key = None if adding else point_id
+            nn_key, nn_dist = st.session_state.hole_hash.nearest(new_x, new_y, exclude=own_key)
+            if nn_key is not None:
+                ref = min(st.session_state.get("spacing", 1.0), st.session_state.get("burden", 1.0))
+                st.caption(
+                    TEXT["nearest_hole"].format(id=nn_key, dist=nn_dist, ratio=nn_dist / ref)
+                )
+
+            submitted = st.button(TEXT["save_changes"], type="primary")
+
+            if submitted:
+                err = None
+                if adding:
+                    err = validate_new(new_x, new_y, new_delay, holes, st.session_state.hole_hash)
+                    if err:
+                        st.error(err)
+                    else:
+                        commit(add_rows(holes, new_x, new_y, new_delay))
+                        st.toast(TEXT["toast_added"].format(x=new_x, y=new_y, d=new_delay))
+                        st.rerun()
+                else:
+                    # Editing existing point
+                    commit(set_rows(holes, [point_pos], x=new_x, y=new_y, delay=new_delay))
+                    st.toast(TEXT["toast_edited"].format(id=point_id))
+                    st.rerun()
+
+    # Batch edit: apply a corrected survey in one undoable transaction
+    with st.expander(TEXT["batch_exp"], expanded=False):
+        st.caption(TEXT["batch_hint"])
+        survey_file = st.file_uploader(TEXT["batch_upload"], type="csv", key="batch_survey")
+        if survey_file and st.button(TEXT["batch_apply"]):
+            try:
+                survey = pd.read_csv(survey_file)
+                is_new = survey["id"].isna() if "id" in survey.columns else pd.Series(True, index=survey.index)
+                drop = survey["delete"].fillna(0).astype(bool) if "delete" in survey.columns else False
+                drop = drop & ~is_new
+                delta = batch_rows(
+                    holes,
+                    updates=survey[~is_new & ~drop],
+                    deletes=survey.loc[drop, "id"].to_numpy(dtype="int64") if "id" in survey.columns else None,
+                )
+                # new holes are checked against the surveyed table, then
+                # added in the same transaction
+                adds = survey[is_new]
+                edited = apply_delta(holes, delta)
+                err = validate_adds(adds, edited) if len(adds) else None
                 if err:
                     st.error(err)
                 else:
-                    push_state(st.session_state.df)
-                    new_row = pd.DataFrame({"x": [new_x], "y": [new_y], "delay": [new_delay]})
-                    st.session_state.df = pd.concat(
-                        [st.session_state.df, new_row], ignore_index=True
-                    )
-                    st.toast(TEXT["toast_added"].format(x=new_x, y=new_y, d=new_delay))
+                    if len(adds):
+                        new = add_rows(edited, adds["x"].to_numpy(), adds["y"].to_numpy(), adds["delay"].to_numpy())
+                        delta = Delta("batch", delta.positions, parts=delta.parts + [new])
+                    commit(delta)
+                    st.toast(TEXT["toast_batch"].format(n=len(survey)))
                     st.rerun()
-            else:
-                # Editing existing point
-                push_state(st.session_state.df)
-                st.session_state.df.at[point_id, "x"] = new_x
-                st.session_state.df.at[point_id, "y"] = new_y
-                st.session_state.df.at[point_id, "delay"] = new_delay
-                st.toast(TEXT["toast_edited"].format(id=point_id))
-                st.rerun()
+            except (KeyError, ValueError) as e:
+                st.error(TEXT["upload_error"].format(err=e))
 
 else:
     # ------------------------------------------------------------------
@@ -190,31 +296,54 @@ else:
     )
     st.sidebar.download_button(
         label=TEXT["download_csv"],
-        data=st.session_state.df.to_csv(index=False),
+        data=df.to_csv(index=True),   # keeps hole ids
         file_name=file_name,
         mime="text/csv",
         use_container_width=True,
     )
 
+    # Binary project: holes + design parameters + cached kriging surfaces
+    project_fmt = st.sidebar.selectbox(TEXT["project_format"], available_formats())
+    design_key = design_hash(df)
+    surfaces = shared_cache().entries(design_key)
+    st.sidebar.download_button(
+        label=TEXT["download_project"],
+        data=cached_project(
+            design_key,
+            holes.ids,
+            design_params(st.session_state),
+            tuple(key for key, _, _ in surfaces),
+            project_fmt,
+            holes,
+            surfaces,
+        ),
+        file_name=f"{file_name.rsplit('.', 1)[0]}.{project_fmt}",
+        mime=PROJECT_FORMATS[project_fmt],
+        use_container_width=True,
+    )
+
 # ------------------------------------------------------------------
 # Plot
 # ------------------------------------------------------------------
 labels = None
-hover_data = {"#id": st.session_state.df.index}
 
 if label_option == TEXT["label_delay"]:
-    labels = st.session_state.df["delay"]
+    labels = df["delay"]
 elif label_option == TEXT["label_index"]:
-    labels = st.session_state.df.index
+    labels = df.index
 # label_none ⇒ no text labels
 
-fig = px.scatter(
-    st.session_state.df,
-    x="x",
-    y="y",
-    text=labels,
-    hover_data=hover_data,
+bounds = detail_region(df["x"], df["y"], TEXT, key="edit_detail")
+traces, lod = hole_traces(
+    df["x"],
+    df["y"],
+    labels=labels,
+    ids=df.index,
+    bounds=bounds,
+    marker=dict(color="blue", size=8, line=dict(width=1, color="black")),
+    name=TEXT["holes"],
 )
+fig = go.Figure(traces)
 
 # Live preview dot for “add” mode
 if edit_mode and adding:
@@ -230,12 +359,11 @@ if edit_mode and adding:
         )
     )
 
-fig.update_traces(
-    marker=dict(color="blue", size=8, line=dict(width=1, color="black")),
-    textposition="top center",
-)
 fig.update_xaxes(visible=False, showgrid=False, scaleanchor="y", scaleratio=1)
 fig.update_yaxes(visible=False, showgrid=False)
-fig.update_layout(height=600, margin=dict(l=0, r=0, t=0, b=0))
+fig.update_layout(height=600, margin=dict(l=0, r=0, t=0, b=0), showlegend=False)
+apply_bounds(fig, bounds)
 
-st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+with stage("plot"):
+    st.plotly_chart(fig, use_container_width=True)
+lod_caption(lod, TEXT)
\ No newline at end of file
@@ -0,0 +1,37 @@
+import pathlib
+import shutil
+import warnings
+
+import pytest
+
+from src.batch import main, run_batch
+
+DATAS = pathlib.Path(__file__).resolve().parent.parent / "datas"
+
+
+@pytest.fixture(autouse=True)
+def quiet():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        yield
+
+
+def test_same_file_names_in_subdirectories(tmp_path):
+    root = tmp_path / "designs"
+    for sub, src in (("b", "v_shape.csv"), ("a", "wavefront.csv")):
+        (root / sub).mkdir(parents=True)
+        shutil.copy(DATAS / src, root / sub / "pattern.csv")
+    paths = [str(root / "b" / "pattern.csv"), str(root / "a" / "pattern.csv")]
+
+    table = run_batch(paths, jobs=2, node_budget=200, root=str(root))
+    assert list(table["design"]) == ["b/pattern.csv", "a/pattern.csv"]
+    assert (table["error"] == "").all()
+    assert table["design_hash"].nunique() == 2
+
+    out = tmp_path / "results.csv"
+    surfaces = tmp_path / "surfaces"
+    assert main([str(root), "--pattern", "**/*.csv", "-o", str(out), "-j", "1",
+                 "--node-budget", "200", "--surfaces", str(surfaces)]) == 0
+    assert sorted(p.relative_to(surfaces).as_posix() for p in surfaces.rglob("*.blast")) == [
+        "a/pattern.blast", "b/pattern.blast",
+    ]
@@ -0,0 +1,31 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from PIL import Image
+
+from src.blast_gif import render_timing_animation_time
+
+LIME = (0, 255, 0)
+
+
+def frames(data: bytes):
+    im = Image.open(io.BytesIO(data))
+    durations = []
+    while True:
+        durations.append(im.info["duration"])
+        try:
+            im.seek(im.tell() + 1)
+        except EOFError:
+            return durations, np.array(im.convert("RGB"))
+
+
+@pytest.mark.parametrize("fmt", ["gif", "apng"])
+def test_time_axis_keeps_time_scale_and_fades_out(fmt):
+    n = 40
+    shot = pd.DataFrame({"x": np.arange(n) % 8, "y": np.arange(n) // 8, "delay": np.linspace(0, 5000, n)})
+    durations, last = frames(render_timing_animation_time(shot, fmt, time_scale=20, max_frames=150, fade_ms=1000))
+    # 5 s shot + 1 s fade at 20x slow motion, frame budget reached
+    assert sum(durations) == pytest.approx(6000 * 20, rel=0.05)
+    assert not np.all(last == LIME, axis=-1).any()
@@ -0,0 +1,61 @@
+import pathlib
+
+import numpy as np
+import pytest
+
+from src.design_io import available_formats, checked_params, load_project, save_project
+from src.ingest import read_holes_csv
+
+DATA_DIR = pathlib.Path(__file__).resolve().parent.parent / "datas"
+
+FORMATS = ["blast", pytest.param("arrow", marks=pytest.mark.skipif(
+    "arrow" not in available_formats(), reason="pyarrow not installed"))]
+
+
+@pytest.fixture
+def project():
+    holes, _ = read_holes_csv(DATA_DIR / "wavefront.csv")
+    holes = holes.delete([0, 3])                # ids no longer 0..n-1
+    params = {"spacing": 1.2, "hole_diameter": 89, "layout": "staggered", "bench_polygon": "0,0\n5,0\n5,5"}
+    rng = np.random.default_rng(0)
+    surfaces = [
+        (("abc", "exponential", "grid", None), rng.random((7, 9)), rng.random((7, 9))),
+        (("abc", "linear", "grid", 24), rng.random((3, 4)), rng.random((3, 4))),
+    ]
+    return holes, params, surfaces
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+@pytest.mark.parametrize("as_path", [False, True])
+def test_round_trip(project, fmt, as_path, tmp_path):
+    holes, params, surfaces = project
+    data = save_project(holes, params, surfaces, fmt)
+    if as_path:
+        path = tmp_path / f"design.{fmt}"
+        path.write_bytes(data)
+        loaded = load_project(path)
+    else:
+        loaded = load_project(data, fmt)
+    got_holes, got_params, got_surfaces = loaded
+
+    np.testing.assert_array_equal(got_holes.ids, holes.ids)
+    for c in ("x", "y", "delay"):
+        np.testing.assert_array_equal(got_holes.column(c), holes.column(c))
+    assert got_params == params
+    assert len(got_surfaces) == len(surfaces)
+    for (key, z, ss), (k0, z0, ss0) in zip(got_surfaces, surfaces):
+        assert key == k0
+        np.testing.assert_array_equal(z, z0)
+        np.testing.assert_array_equal(ss, ss0)
+
+
+def test_loaded_params_are_filtered(project):
+    holes, _, _ = project
+    hostile = {
+        "holes": None, "text": {}, "lang": "xx", "history": 1,     # session keys, not parameters
+        "spacing": "1.2", "hole_diameter": True, "layout": "spiral", "burden": float("nan"),
+        "hole_depth": 12, "rotation": 15,
+    }
+    assert checked_params(hostile) == {"hole_depth": 12.0, "rotation": 15}
+    _, params, _ = load_project(save_project(holes, hostile), "blast")
+    assert params == {"hole_depth": 12.0, "rotation": 15}
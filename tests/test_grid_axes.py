@@ -0,0 +1,23 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.kriging import grid_axes, krige_adaptive
+
+
+@pytest.mark.parametrize("shape", ["row", "column", "single"])
+def test_degenerate_patterns_krige(shape):
+    n = 1 if shape == "single" else 10
+    line = np.arange(n, dtype=float)
+    x, y = (line, np.zeros(n)) if shape != "column" else (np.zeros(n), line)
+    df = pd.DataFrame({"x": x, "y": y, "delay": line * 25})
+    gx, gy = grid_axes(df)
+    assert (np.diff(gx) > 0).all() and (np.diff(gy) > 0).all()
+    if n > 1:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            fx, fy, z, ss = krige_adaptive(df, "linear", node_budget=400)
+        assert z.shape == (len(fy), len(fx))
+        assert np.isfinite(z).all()
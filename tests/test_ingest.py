@@ -0,0 +1,51 @@
+import gc
+
+import numpy as np
+import pytest
+
+import src.ingest as ingest
+
+
+def survey_csv(n: int = 5000) -> bytes:
+    rows = ["x,y,delay,id"] + [f"{i},{2 * i},{i / 2},{i}" for i in range(n)]
+    rows[4001] = "4000,abc,1,4000"          # bad cells well past the first block
+    rows[4501] = "4500,,2,4500"
+    return ("\n".join(rows) + "\n").encode()
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_bad_cells_in_later_blocks_are_dropped(engine, monkeypatch):
+    if engine == "pyarrow":
+        pytest.importorskip("pyarrow.csv")
+        monkeypatch.setattr(ingest, "ARROW_BLOCK_BYTES", 4096)
+    holes, report = ingest.read_holes_csv(survey_csv(), chunksize=1000, engine=engine)
+    assert report["bad_rows"] == 2
+    assert report["bad_lines"] == [4002, 4502]
+    assert len(holes) == 4998
+    assert 4000 not in holes and 4500 not in holes
+    assert np.isfinite(holes.x).all() and np.isfinite(holes.y).all()
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_quoted_header_with_comma(engine):
+    if engine == "pyarrow":
+        pytest.importorskip("pyarrow.csv")
+    data = b'"id, legacy",x,y,delay\n7,1,2,3\n8,4,5,6\n'
+    holes, report = ingest.read_holes_csv(data, engine=engine)
+    assert report["missing"] == []
+    np.testing.assert_array_equal(holes.x, [1, 4])
+    np.testing.assert_array_equal(holes.ids, [0, 1])       # no "id" column
+
+
+@pytest.mark.filterwarnings("error")
+def test_paths_are_closed_and_file_objects_left_open(tmp_path):
+    path = tmp_path / "holes.csv"
+    path.write_bytes(survey_csv())
+    missing = tmp_path / "missing.csv"
+    missing.write_bytes(b"a,b\n1,2\n")
+    ingest.read_holes_csv(path)
+    ingest.read_holes_csv(missing)
+    gc.collect()
+    with open(path, "rb") as fh:
+        ingest.read_holes_csv(fh)
+        assert not fh.closed
@@ -0,0 +1,54 @@
+import pathlib
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.kriging import (
+    local_deviation, grid_axes, krige_adaptive, design_hash, trusted_surfaces,
+    KrigingCache, LOCAL_TOLERANCE, WINDOW_DEVIATION,
+)
+
+DATAS = sorted((pathlib.Path(__file__).resolve().parent.parent / "datas").glob("*.csv"))
+MODELS = ["exponential", "spherical", "gaussian", "linear", "power"]
+
+
+@pytest.fixture(autouse=True)
+def quiet():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        yield
+
+
+@pytest.mark.parametrize("model", MODELS)
+@pytest.mark.parametrize("path", DATAS, ids=lambda p: p.stem)
+def test_local_kriging_tolerance(path, model):
+    df = pd.read_csv(path)
+    gridx, gridy = grid_axes(df)
+    # default settings: small patterns fall back to the global solve
+    assert local_deviation(df, model, gridx, gridy) <= LOCAL_TOLERANCE
+    # the moving window itself
+    assert local_deviation(df, model, gridx, gridy, min_holes=0) <= WINDOW_DEVIATION
+
+
+def test_trusted_surfaces():
+    df = pd.read_csv(DATAS[0])
+    cache = KrigingCache()
+    krige_adaptive(df, "linear", node_budget=400, cache=cache)
+    surfaces = cache.entries(design_hash(df))
+    assert len(surfaces) == 2   # the adaptive surface and its coarse grid
+    assert [k for k, _, _ in trusted_surfaces(df, surfaces)] == [k for k, _, _ in surfaces]
+
+    other = df.assign(delay=df["delay"] + 1)
+    assert trusted_surfaces(other, surfaces) == []
+    (key, z, ss), coarse = surfaces[-1], surfaces[0]
+    forged = [
+        (key, z[:-1], ss[:-1]),                          # wrong shape
+        (key[:5] + (16,) + key[6:], z, ss),              # grid the key does not name
+        (key[:1] + ("nugget",) + key[2:], z, ss),        # unknown model
+        (coarse[0][:3] + ("many",), coarse[1], coarse[2]),
+    ]
+    assert trusted_surfaces(df, forged) == []
+    got = trusted_surfaces(df, [(list(key), z.tolist(), ss.tolist())])
+    assert got[0][0] == key and not got[0][1].flags.writeable
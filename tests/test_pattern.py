@@ -0,0 +1,17 @@
+import numpy as np
+import pytest
+
+from src.pattern import fill_polygon
+
+SQUARE = np.array([(0, 0), (10, 0), (10, 10), (0, 10)], dtype=float)
+
+
+@pytest.mark.parametrize("layout", ["square", "staggered", "echelon"])
+def test_fill_polygon_limit(layout):
+    x, _ = fill_polygon(SQUARE, 1.0, 1.0, 30.0, layout)
+    assert 0 < len(x) <= 400
+    with pytest.raises(ValueError, match="pattern limit"):
+        fill_polygon(SQUARE, 1.0, 1.0, 30.0, layout, max_holes=len(x) - 1)
+    # checked before any array is built: a millimetre grid over a 100 km bench
+    with pytest.raises(ValueError, match="pattern limit"):
+        fill_polygon(SQUARE * 10_000, 1e-3, 1e-3, 0.0, layout)
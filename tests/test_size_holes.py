@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.blast_math import burden, hole_charge_mass, linear_charge, size_holes, spacing
+from src.config import DEFAULT_EXPLOSIVE_DENSITY, DEFAULT_HOLE_DEPTH, DEFAULT_HOLE_DIAMETER
+
+
+def scalar_row(diameter, depth, stemming, density, powder_factor=0.45, sp_ratio=1.15):
+    lin = linear_charge(density, diameter)
+    charge_len = depth - stemming
+    bur = burden(charge_len, lin, depth, powder_factor, sp_ratio)
+    return {
+        "linear_charge": lin,
+        "charge_length": charge_len,
+        "charge_mass": hole_charge_mass(lin, charge_len),
+        "burden": bur,
+        "spacing": spacing(bur, sp_ratio),
+    }
+
+
+def test_per_hole_columns_match_scalar_functions():
+    rng = np.random.default_rng(0)
+    n = 50
+    holes = pd.DataFrame({
+        "x": rng.random(n),
+        "y": rng.random(n),
+        "diameter": rng.uniform(32, 200, n),
+        "depth": rng.uniform(2, 20, n),
+        "stemming": rng.uniform(0.3, 1.5, n),
+        "density": rng.uniform(0.8, 1.3, n),
+    }, index=np.arange(100, 100 + n))
+    out = size_holes(holes, powder_factor=0.45)
+    assert out.index.equals(holes.index)
+    for i, row in holes.iterrows():
+        expected = scalar_row(row["diameter"], row["depth"], row["stemming"], row["density"])
+        for c, v in expected.items():
+            assert out.loc[i, c] == pytest.approx(v)
+
+
+def test_missing_columns_use_config_defaults():
+    out = size_holes(pd.DataFrame({"x": [0.0, 1.0], "y": [0.0, 0.0]}), stemming_length_m=0.5, powder_factor=0.45)
+    expected = scalar_row(DEFAULT_HOLE_DIAMETER, DEFAULT_HOLE_DEPTH, 0.5, DEFAULT_EXPLOSIVE_DENSITY)
+    for c, v in expected.items():
+        np.testing.assert_allclose(out[c], v)
@@ -0,0 +1,45 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.spatial_hash import SpatialHash
+
+
+def brute_nearest(points, x, y, exclude=None):
+    best_key, best = None, math.inf
+    for key, (px, py) in points.items():
+        d = math.hypot(px - x, py - y)
+        if key != exclude and d < best:
+            best_key, best = key, d
+    return best_key, best
+
+
+@pytest.mark.parametrize("spread", [5.0, 200.0])
+def test_nearest_matches_brute_force_through_edits(spread):
+    rng = np.random.default_rng(1)
+    xy = rng.uniform(-spread, spread, (300, 2))
+    sh = SpatialHash.from_xy(range(len(xy)), xy[:, 0], xy[:, 1])
+    points = {k: tuple(p) for k, p in enumerate(xy.tolist())}
+    for step in range(200):
+        key = int(rng.integers(len(xy)))
+        if key in points and step % 3 == 0:
+            sh.remove(key)
+            del points[key]
+        else:
+            p = tuple(rng.uniform(-2 * spread, 2 * spread, 2).tolist())
+            sh.add(key, *p)
+            points[key] = p
+        qx, qy = rng.uniform(-3 * spread, 3 * spread, 2)
+        exclude = next(iter(points), None)
+        k, d = sh.nearest(qx, qy, exclude=exclude)
+        assert d == pytest.approx(brute_nearest(points, qx, qy, exclude)[1])
+
+
+def test_nearest_empty():
+    sh = SpatialHash()
+    assert sh.nearest(0.0, 0.0) == (None, math.inf)
+    sh.add("a", 1.0, 1.0)
+    assert sh.nearest(0.0, 0.0, exclude="a") == (None, math.inf)
+    sh.remove("a")
+    assert sh.nearest(0.0, 0.0) == (None, math.inf)
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from src.blast_math import pareto_front, rank_designs, sweep_designs, sweep_front
+
+AXES = (
+    np.linspace(40, 120, 12),
+    np.linspace(3, 10, 10),
+    np.linspace(0.85, 1.25, 5),
+    np.linspace(0.3, 1.2, 6),
+    np.linspace(0.3, 0.7, 15),
+)
+
+
+def test_reduced_sweep_keeps_front_and_rankings():
+    full = sweep_designs(*AXES, workers=1)
+    result = sweep_front(*AXES, keep=20, workers=1)
+    assert result.candidates == len(full)
+    assert len(result.designs) < len(full)
+    assert result.designs["pareto"].sum() == pareto_front(full).sum()
+    for w in np.linspace(0, 1, 11):
+        expected = np.sort(rank_designs(full, w))[:20]
+        got = np.sort(rank_designs(result.designs, w, result.ranges))[:20]
+        np.testing.assert_allclose(got, expected)
+
+
+def test_sweep_limit():
+    with pytest.raises(ValueError):
+        sweep_front(*AXES, max_candidates=1000, workers=1)